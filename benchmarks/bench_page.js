@@ -0,0 +1,213 @@
+#!/usr/bin/env node
+/*
+bench_page.js — Player page micro-benchmark (Node, no browser)
+Runs the script of a generated index.html in a vm with a minimal DOM stub
+and times the client side against that folder's data: evaluating the data
+scripts, boot()/init(), building and fully expanding the folder tree,
+rendering and scrolling the virtual track list, and doSearch() for a few
+queries taken from the library itself.
+
+Usage:
+    node benchmarks/bench_page.js OUT_DIR [--runs 5] [--json]
+
+OUT_DIR is a generator output folder, e.g. from
+    python benchmarks/bench_scan.py --tracks 20000 --art-sizes --keep OUT_DIR
+The search "worker" runs on the page thread (its no-Worker fallback), so
+search times are the matching itself plus message hops; IndexedDB is
+reported unavailable, so boot() always takes the direct load path.
+*/
+
+"use strict";
+const fs = require("fs"), path = require("path"), vm = require("vm");
+const { performance } = require("perf_hooks");
+
+const argv = process.argv.slice(2);
+const outDir = argv.find(a => !a.startsWith("--"));
+const runs = +(argv[argv.indexOf("--runs") + 1] || 0) || 5;
+const asJSON = argv.includes("--json");
+if (!outDir) {
+  console.error("usage: node bench_page.js OUT_DIR [--runs 5] [--json]");
+  process.exit(2);
+}
+
+// ── DOM stub ──────────────────────────────────────────────────────────────────
+// Only what the page touches; layout is a fixed 600px viewport.
+class El {
+  constructor(tag = "div") {
+    this.tagName = tag.toUpperCase();
+    this.style = {}; this.dataset = {}; this.children = []; this.attrs = {};
+    this.textContent = ""; this.innerHTML = ""; this.value = ""; this.className = "";
+    this.scrollTop = 0; this.offsetTop = 0; this.clientHeight = 600; this.offsetWidth = 260;
+    const cls = new Set();
+    this.classList = {
+      add: (...c) => c.forEach(x => cls.add(x)), remove: (...c) => c.forEach(x => cls.delete(x)),
+      toggle: (c, on = !cls.has(c)) => { on ? cls.add(c) : cls.delete(c); return on; },
+      contains: c => cls.has(c),
+    };
+  }
+  addEventListener() {} removeEventListener() {}
+  appendChild(c) { this.children.push(c); return c; }
+  insertBefore(c) { return this.appendChild(c); }
+  removeChild(c) { this.children = this.children.filter(x => x !== c); return c; }
+  replaceChildren(...c) { this.children = c; }
+  setAttribute(k, v) { this.attrs[k] = v; } getAttribute(k) { return this.attrs[k]; }
+  querySelector() { return null; } querySelectorAll() { return []; }
+  contains() { return false; } closest() { return null; }
+  scrollIntoView() {} scrollTo(o) { this.scrollTop = o.top || 0; }
+  getBoundingClientRect() { return { top: 0, left: 0, width: this.offsetWidth, height: this.clientHeight }; }
+  play() { return Promise.resolve(); } pause() {}
+}
+
+const scriptMs = {};   // data script → ms spent evaluating it
+const els = {};
+const document = {
+  head: new El("head"), body: new El("body"),
+  getElementById: id => els[id] || (els[id] = new El(id === "audio" ? "audio" : "div")),
+  createElement: tag => new El(tag),
+  createDocumentFragment: () => new El("fragment"),
+  querySelector: () => null, querySelectorAll: () => [], addEventListener() {},
+};
+// Injected <script src> elements run as soon as they are appended, like a cached load.
+document.head.appendChild = s => {
+  setImmediate(() => {
+    const file = path.join(outDir, s.src);
+    if (!fs.existsSync(file)) { s.onerror && s.onerror(); return; }
+    const src = fs.readFileSync(file, "utf8");
+    const t0 = performance.now();
+    vm.runInContext(src, ctx, { filename: s.src });
+    scriptMs[s.src] = (scriptMs[s.src] || 0) + performance.now() - t0;
+    s.onload && s.onload();
+  });
+  return s;
+};
+
+// setTimeout(f, 0) is clamped to 1ms in Node; the page uses it for message
+// hops, so zero delays run on the next turn instead.
+const later = (f, ms, ...a) => ms ? setTimeout(f, ms, ...a) : setImmediate(f, ...a);
+const cancel = h => { if (h && h.constructor.name === "Immediate") clearImmediate(h); else clearTimeout(h); };
+const ctx = vm.createContext({
+  document, console, performance, atob, btoa, TextEncoder, TextDecoder,
+  setTimeout: later, clearTimeout: cancel,
+  requestAnimationFrame: f => setImmediate(f),
+  sessionStorage: { getItem: () => null, setItem() {} },
+  location: { protocol: "file:", reload() {} },
+  indexedDB: { open() { const r = {}; setImmediate(() => r.onerror && r.onerror()); return r; } },
+  Blob: class { constructor(parts) { this.parts = parts; } },
+  URL: { createObjectURL: () => "blob:" },
+  CSS: { escape: s => s },
+  addEventListener() {},
+});
+ctx.window = ctx.self = ctx;
+
+// ── Helpers ───────────────────────────────────────────────────────────────────
+const run = code => vm.runInContext(code, ctx);
+
+// Median and best of n runs of fn; setup, if given, runs untimed before each.
+async function time(fn, setup = null, n = runs) {
+  const samples = [];
+  for (let i = 0; i < n; i++) {
+    if (setup) await setup();
+    const t0 = performance.now();
+    await fn();
+    samples.push(performance.now() - t0);
+  }
+  samples.sort((a, b) => a - b);
+  return { median_ms: +samples[samples.length >> 1].toFixed(3), min_ms: +samples[0].toFixed(3) };
+}
+
+// A few queries that hit: a frequent title word, its 2-letter prefix, two
+// words from one track, an artist; plus one that matches nothing.
+function pickQueries() {
+  return run(`(() => {
+    const counts = new Map();
+    for (let id = 0; id < ALL_TRACKS.length; id += Math.max(1, ALL_TRACKS.length >> 12)) {
+      for (const w of queryWords(ALL_TRACKS[id].title)) counts.set(w, (counts.get(w) || 0) + 1);
+    }
+    const common = [...counts].sort((a, b) => b[1] - a[1] || (a[0] < b[0] ? -1 : 1)).map(e => e[0]);
+    const mid = ALL_TRACKS[ALL_TRACKS.length >> 1] || { title: "", artist: "" };
+    const two = queryWords(mid.title + " " + mid.artist).slice(0, 2).join(" ");
+    return [common[0], (common[0] || "").slice(0, 2), two, mid.artist, "zzqxj"].filter(q => q);
+  })()`);
+}
+
+// ── Benchmark ─────────────────────────────────────────────────────────────────
+async function main() {
+  const html = fs.readFileSync(path.join(outDir, "index.html"), "utf8");
+  const inline = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)].map(m => m[1]).join("\n");
+  const src = [...html.matchAll(/<script src="([^"]+)"><\/script>/g)].map(m => m[1]);
+  for (const s of src) {
+    const file = path.join(outDir, s);
+    if (fs.existsSync(file)) vm.runInContext(fs.readFileSync(file, "utf8"), ctx, { filename: s });
+  }
+  // Load the page without starting it, then time boot() with init() metered.
+  vm.runInContext(inline.replace(/\bboot\(\);\s*$/, ""), ctx, { filename: "index.html" });
+  const res = {};
+  run(`const __init = init; init = () => { const t0 = performance.now(); __init(); __bench.init_ms = performance.now() - t0; };`);
+  ctx.__bench = {};
+  let t0 = performance.now();
+  await run("boot()");
+  res.boot_ms = +(performance.now() - t0).toFixed(3);
+  res.init_ms = +ctx.__bench.init_ms.toFixed(3);
+  res.parse_ms = +(scriptMs["audiodata.js"] || 0).toFixed(3);
+  res.tracks = run("ALL_TRACKS.length");
+  res.folders = run("FOLDERS.tree.length");
+  res.status = els["idb-status"].textContent;
+  if (!res.tracks) throw new Error(`no tracks loaded from ${outDir} (${els["loader"].innerHTML || res.status})`);
+  if (run("MANIFEST !== null")) throw new Error("sharded output (--shards) is not supported");
+
+  const collapsed = () => run(`
+    TREE_NODES.clear();
+    TREE = buildTree(FOLDERS);
+    TREE_TOP = treeLevel(TREE, 0, null);
+    flattenTree();`);
+  res.tree = await time(collapsed);
+  res.tree_expand = await time(() => run(`
+    (function openAll(level) { for (const n of level) { setOpen(n, true); if (n.kids) openAll(n.kids); } })(TREE_TOP);
+    flattenTree();`), collapsed);
+  res.tree_rows = run("TREE_ROWS.length");
+  collapsed();
+
+  res.render = await time(() => run("renderTracks(VIEW_IDS, '')"));
+  // 100 scroll steps of 2½ screens each through the list, repainting every step.
+  res.scroll = await time(() => run(`
+    for (let k = 0; k < 100; k++) {
+      listEl.scrollTop = (k * 1500) % Math.max(1, VIEW_IDS.length * ROW_H);
+      paintRows(false);
+    }`));
+
+  const queries = pickQueries();
+  t0 = performance.now();
+  await run(`doSearch(${JSON.stringify(queries[0])})`);
+  res.search_first_ms = +(performance.now() - t0).toFixed(3);
+  res.search_index_ms = +(scriptMs["audiodata.search.js"] || 0).toFixed(3);
+  res.search = {};
+  for (const q of queries) {
+    res.search[q] = await time(() => run(`doSearch(${JSON.stringify(q)})`));
+    res.search[q].hits = run("VIEW_IDS.length");
+  }
+  const top = run("TREE_TOP.reduce((a, n) => n.data.count > a.data.count ? n : a).path");
+  res.folder = await time(() => run(`viewIds(${JSON.stringify(top)}, [])`));
+  res.folder.path = top;
+  return res;
+}
+
+main().then(res => {
+  if (asJSON) {
+    console.log(JSON.stringify({ bench: "page", node: process.version, runs, ...res }));
+  } else {
+    const ms = r => `${r.median_ms.toFixed(1).padStart(8)}ms ${r.min_ms.toFixed(1).padStart(8)}ms`;
+    console.log(`\n${res.tracks} tracks, ${res.folders} folders (${res.status})`);
+    console.log(`  audiodata.js eval ${res.parse_ms.toFixed(1)}ms · boot ${res.boot_ms.toFixed(1)}ms · init ${res.init_ms.toFixed(1)}ms`);
+    console.log(`  first search ${res.search_first_ms.toFixed(1)}ms (index eval ${res.search_index_ms.toFixed(1)}ms)`);
+    console.log(`${"step".padStart(24)} ${"median".padStart(10)} ${"min".padStart(10)}`);
+    console.log(`${"tree".padStart(24)} ${ms(res.tree)}`);
+    console.log(`${`tree expand (${res.tree_rows})`.padStart(24)} ${ms(res.tree_expand)}`);
+    console.log(`${"render".padStart(24)} ${ms(res.render)}`);
+    console.log(`${"scroll ×100".padStart(24)} ${ms(res.scroll)}`);
+    for (const [q, r] of Object.entries(res.search)) {
+      console.log(`${`"${q}" (${r.hits})`.slice(-24).padStart(24)} ${ms(r)}`);
+    }
+    console.log(`${"folder view".padStart(24)} ${ms(res.folder)}`);
+  }
+  process.exit(0);
+}, err => { console.error(err); process.exit(1); });
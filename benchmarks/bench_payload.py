@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_payload.py — audiodata.js size / parse-time comparison
+Writes the same synthetic library with every --data-format and reports the
+file size and the JSON.parse time of its payload under Node.
+
+Usage:
+    python benchmarks/bench_payload.py [--tracks 200000] [--runs 5]
+
+Node is optional; without it only sizes are reported.
+"""
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mugal26
+
+FORMATS = ("rows", "columns")
+
+PARSE_JS = r"""
+const fs = require("fs");
+const [file, runs] = [process.argv[2], +process.argv[3]];
+const src = fs.readFileSync(file, "utf8");
+const body = src.slice(src.indexOf("=") + 1, src.lastIndexOf(";"));
+const times = [];
+for (let i = 0; i < runs; i++) {
+  const t0 = process.hrtime.bigint();
+  JSON.parse(body);
+  times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+}
+times.sort((a, b) => a - b);
+console.log(JSON.stringify({ median_ms: times[times.length >> 1], min_ms: times[0] }));
+"""
+
+def synthetic_tracks(n: int, seed: int = 1) -> list[dict]:
+    """Track dicts shaped like scan() output: ~12-track albums, ~10 albums per artist."""
+    rnd = random.Random(seed)
+    genres = [f"Genre {i}" for i in range(40)]
+    tracks = []
+    album_no = 0
+    while len(tracks) < n:
+        artist = f"Artist {album_no // 10:05d}"
+        album = f"Album Title {album_no:06d}"
+        folder = f"{artist[0]}/{artist}/{album_no % 10:02d} - {album}"
+        genre = rnd.choice(genres)
+        year = str(rnd.randint(1960, 2024))
+        for k in range(min(rnd.randint(8, 16), n - len(tracks))):
+            name = f"{k + 1:02d} - Song number {k + 1} of {album}.flac"
+            tracks.append({
+                "path": f"{folder}/{name}", "title": f"Song number {k + 1} of {album}",
+                "artist": artist, "album": album, "albumArtist": artist,
+                "track": k + 1, "disc": 1, "year": year, "genre": genre,
+                "duration": round(rnd.uniform(90, 420), 2), "art": None, "folder": folder,
+            })
+        album_no += 1
+    return tracks
+
+def main():
+    p = argparse.ArgumentParser(description="Compare audiodata.js payload formats")
+    p.add_argument("--tracks", type=int, default=200_000)
+    p.add_argument("--runs", type=int, default=5, help="JSON.parse repetitions per format")
+    p.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = p.parse_args()
+
+    tracks = synthetic_tracks(args.tracks)
+    node = shutil.which("node")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        script = Path(tmp) / "parse.js"
+        script.write_text(PARSE_JS)
+        for fmt in FORMATS:
+            out_dir = Path(tmp) / fmt
+            out_dir.mkdir()
+            mugal26.write_datafile(tracks, {}, out_dir, Path("/music"), data_format=fmt)
+            data = out_dir / mugal26.DATAFILE
+            row = {"format": fmt, "tracks": len(tracks), "bytes": data.stat().st_size}
+            if node:
+                out = subprocess.run([node, str(script), str(data), str(args.runs)],
+                                     check=True, capture_output=True, text=True).stdout
+                row.update(json.loads(out))
+            results.append(row)
+
+    if args.json:
+        for r in results:
+            print(json.dumps(r))
+        return
+    base = results[0]
+    print(f"\n{args.tracks} tracks" + ("" if node else " (node not found: sizes only)"))
+    print(f"{'format':>8} {'size':>10} {'vs rows':>8} {'JSON.parse':>11}")
+    for r in results:
+        parse = f"{r['median_ms']:>9.1f}ms" if "median_ms" in r else f"{'-':>11}"
+        print(f"{r['format']:>8} {r['bytes'] / 2**20:>8.1f}MB {r['bytes'] / base['bytes']:>7.0%} {parse}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+bench_scan.py — Scan / write stage timings
+Times a cold run of the generator stage by stage on a synthetic library
+(synthlib.py) or on ROOT: directory walk, tag parse, art (embedded and
+folder covers, thumbnailed), and writing the data scripts.
+
+Usage:
+    python benchmarks/bench_scan.py [ROOT] [--tracks 2000] [--folders 160]
+                                    [--mix mp3=6,flac=3,ogg=1,m4a=1] [--runs 3] [--jobs 1]
+                                    [--data-format rows] [--art-mode inline]
+                                    [--json] [--history FILE] [--keep DIR]
+
+"art" is the extra time a scan with art takes over the tag-only scan.
+The thumbnail cache is not used, so every cover is decoded and encoded.
+Each result carries the mugal26 commit, Python and platform; --history
+appends it to a JSON lines file so runs of different versions can be
+compared. --keep leaves the last run's output (index.html + data scripts)
+in DIR, e.g. for bench_page.js.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+import mugal26
+import synthlib
+
+STAGES = ("walk", "tags", "art", "write")
+
+def mugal_args(*argv: str) -> argparse.Namespace:
+    """mugal26's own CLI parse of argv, so every option has its real default."""
+    saved = sys.argv
+    sys.argv = ["mugal26.py", *argv]
+    try:
+        return mugal26.parse_args()
+    finally:
+        sys.argv = saved
+
+def commit() -> str | None:
+    """Short commit of the mugal26 being measured, "+" if the tree is dirty; None outside git."""
+    try:
+        rev = subprocess.run(["git", "-C", str(REPO), "rev-parse", "--short", "HEAD"],
+                             check=True, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "-C", str(REPO), "status", "--porcelain", "--", "mugal26.py"],
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return rev + ("+" if dirty else "")
+
+def run_once(root: Path, out_dir: Path, opts: list[str]) -> dict:
+    """One cold pass over root; returns seconds per stage plus output counts."""
+    art_args = mugal_args(str(root), *opts)
+    tag_args = mugal_args(str(root), "--no-art", *opts)
+    settings = mugal26.ArtSettings.from_args(art_args)
+    jobs = art_args.jobs if art_args.jobs > 0 else (os.cpu_count() or 1)
+    times = {}
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        t0 = time.perf_counter()
+        files = [root / rel for rel, _ in
+                 mugal26.iter_audio_files(root, mugal26.PathFilter(art_args.exclude, art_args.include))]
+        times["walk"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        mugal26.scan_files(files, root, tag_args, jobs, settings, {}, {})
+        times["tags"] = time.perf_counter() - t0
+
+        art: dict = {}
+        t0 = time.perf_counter()
+        tracks = [t for t in mugal26.scan_files(files, root, art_args, jobs, settings, {}, art) if t]
+        times["art"] = max(0.0, time.perf_counter() - t0 - times["tags"])
+
+        t0 = time.perf_counter()
+        mugal26.write_datafile(tracks, art, out_dir, root, art_mode=art_args.art_mode,
+                               art_settings=settings, data_format=art_args.data_format)
+        times["write"] = time.perf_counter() - t0
+    return {"times": times, "files": len(files), "tracks": len(tracks), "art": len(art),
+            "bytes": (out_dir / mugal26.DATAFILE).stat().st_size}
+
+def main():
+    p = argparse.ArgumentParser(description="Time the scan and write stages of mugal26")
+    p.add_argument("root", type=Path, nargs="?", help="Existing library (default: generate one)")
+    p.add_argument("--tracks", type=int, default=2000, help="Synthetic library size")
+    p.add_argument("--folders", type=int, default=160, help="Synthetic album folders")
+    p.add_argument("--mix", default=synthlib.DEFAULT_MIX, help="Synthetic format weights (default %(default)s)")
+    p.add_argument("--embedded", type=float, default=0.5, help="Share of synthetic albums with embedded art")
+    p.add_argument("--covers", type=float, default=0.3, help="Share of synthetic albums with a cover.jpg")
+    p.add_argument("--art-sizes", type=int, nargs="*", default=[500, 1000], metavar="PX")
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("-j", "--jobs", type=int, default=1)
+    p.add_argument("--tag-reader", choices=("lite", "full"), default="lite")
+    p.add_argument("--data-format", choices=("rows", "columns"), default="rows")
+    p.add_argument("--art-mode", choices=("inline", "files", "sprites"), default="inline")
+    p.add_argument("--json", action="store_true", help="Print the result as a JSON line")
+    p.add_argument("--history", type=Path, metavar="FILE", help="Append the result to this JSON lines file")
+    p.add_argument("--keep", type=Path, metavar="DIR", help="Leave the last run's output in DIR")
+    args = p.parse_args()
+    try:
+        mix = synthlib.parse_mix(args.mix)
+    except ValueError as e:
+        p.error(str(e))
+
+    opts = ["--jobs", str(args.jobs), "--tag-reader", args.tag_reader,
+            "--data-format", args.data_format, "--art-mode", args.art_mode]
+    result = {"bench": "scan", "commit": commit(), "time": int(time.time()),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "cpus": os.cpu_count(), "jobs": args.jobs, "tag_reader": args.tag_reader,
+              "data_format": args.data_format, "art_mode": args.art_mode, "runs": args.runs}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root
+        if root is None:
+            root = Path(tmp) / "library"
+            t0 = time.perf_counter()
+            result["library"] = synthlib.make_library(
+                root, args.tracks, args.folders, mix,
+                args.embedded, args.covers, tuple(args.art_sizes))
+            result["library"]["mix"] = args.mix
+            result["generate_s"] = round(time.perf_counter() - t0, 3)
+        else:
+            result["library"] = {"root": str(root)}
+        runs = []
+        for n in range(args.runs):
+            out_dir = Path(tmp) / f"out{n}"
+            out_dir.mkdir()
+            runs.append(run_once(root, out_dir, opts))
+        if args.keep:
+            shutil.copytree(out_dir, args.keep, dirs_exist_ok=True)
+            with contextlib.redirect_stdout(sys.stderr):
+                mugal26.write_html(args.keep)
+
+    last = runs[-1]
+    result.update({k: last[k] for k in ("files", "tracks", "art", "bytes")})
+    for stage in STAGES:
+        samples = [r["times"][stage] for r in runs]
+        result[f"{stage}_s"] = round(statistics.median(samples), 4)
+        result[f"{stage}_min_s"] = round(min(samples), 4)
+    result["total_s"] = round(sum(result[f"{s}_s"] for s in STAGES), 4)
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    print(f"\n{result['files']} files → {result['tracks']} tracks, {result['art']} covers, "
+          f"{mugal26.DATAFILE} {result['bytes'] / 1024:.0f}KB "
+          f"({result['commit'] or 'no git'}, {args.runs} runs, {args.jobs} job(s))")
+    print(f"{'stage':>6} {'median':>9} {'min':>9} {'µs/file':>9}")
+    for stage in STAGES:
+        med, low = result[f"{stage}_s"], result[f"{stage}_min_s"]
+        per = med / max(1, result["files"]) * 1e6
+        print(f"{stage:>6} {med * 1000:>7.1f}ms {low * 1000:>7.1f}ms {per:>9.1f}")
+    print(f"{'total':>6} {result['total_s'] * 1000:>7.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+bench_tags.py — Tag reader I/O report
+Shows how many bytes the lite tag reader pulls from each file compared with
+a full MutagenFile parse, with and without art.
+
+Usage:
+    python benchmarks/bench_tags.py ROOT [--limit N] [--per-file]
+
+Only the audio files under ROOT are opened; nothing is written.
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mugal26
+
+class CountingFile(io.RawIOBase):
+    """Read-only file wrapper that counts the bytes handed out."""
+
+    def __init__(self, path: Path):
+        self._f = open(path, "rb")
+        self.name = str(path)
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, n=-1):
+        data = self._f.read(n)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, b):
+        n = self._f.readinto(b)
+        self.bytes_read += n or 0
+        return n
+
+    def seek(self, offset, whence=0):
+        return self._f.seek(offset, whence)
+
+    def tell(self):
+        return self._f.tell()
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+def measure(path: Path, want_art: bool, lite: bool) -> tuple[int, float]:
+    f = CountingFile(path)
+    try:
+        t0 = time.perf_counter()
+        mugal26.read_tags(path, want_art=want_art, lite=lite, fileobj=f)
+        return f.bytes_read, time.perf_counter() - t0
+    finally:
+        f.close()
+
+def fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+def main():
+    p = argparse.ArgumentParser(description="Compare bytes read by the lite and full tag readers")
+    p.add_argument("root", type=Path)
+    p.add_argument("--limit", type=int, default=0, help="Only look at the first N files")
+    p.add_argument("--per-file", action="store_true", help="Print one line per file")
+    args = p.parse_args()
+
+    files = sorted(rel for rel, _ in mugal26.iter_audio_files(args.root, mugal26.PathFilter([])))
+    if args.limit:
+        files = files[:args.limit]
+    cases = [("full", True, False), ("lite", True, True), ("lite no-art", False, True)]
+    totals = {name: [0, 0.0] for name, *_ in cases}
+    by_ext: dict[str, dict[str, int]] = {}
+    for rel in files:
+        path = args.root / rel
+        row = []
+        for name, want_art, lite in cases:
+            try:
+                n, dt = measure(path, want_art, lite)
+            except Exception:
+                n, dt = 0, 0.0
+            totals[name][0] += n
+            totals[name][1] += dt
+            ext = by_ext.setdefault(path.suffix.lower(), {c[0]: 0 for c in cases})
+            ext[name] += n
+            row.append(fmt_bytes(n))
+        if args.per_file:
+            print(f"{' / '.join(row):>30}  {rel}")
+
+    if not files:
+        print("No audio files found.")
+        return
+    print(f"\n{len(files)} files, {fmt_bytes(sum(path.stat().st_size for path in (args.root / r for r in files)))} on disk")
+    print(f"{'reader':>12} {'bytes read':>11} {'per file':>9} {'ms/file':>8}")
+    for name, (n, dt) in totals.items():
+        print(f"{name:>12} {fmt_bytes(n):>11} {fmt_bytes(n / len(files)):>9} {dt / len(files) * 1000:>8.2f}")
+    print("\nper extension (full / lite / lite no-art):")
+    for ext, counts in sorted(by_ext.items()):
+        print(f"  {ext:>6}: " + " / ".join(fmt_bytes(counts[c[0]]) for c in cases))
+
+if __name__ == "__main__":
+    main()
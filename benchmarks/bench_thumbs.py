@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+bench_thumbs.py — Thumbnail pipeline benchmark
+Compares per-image latency and peak RSS of mugal26.make_thumb() against the
+original full-decode pipeline (convert("RGB") → thumbnail → optimize=True).
+
+Usage:
+    python benchmarks/bench_thumbs.py [--sizes 500 1500 3000] [--runs 20] [--thumb 80]
+
+Each (pipeline, source size) pair runs in a fresh interpreter so peak RSS
+is not polluted by earlier runs. Covers are generated in a child as well:
+Linux carries a parent's RSS high-water mark into forked children.
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PIPELINES = ("legacy", "fast", "fast-noopt")
+
+def make_cover(px: int) -> bytes:
+    """Synthetic photo-like JPEG cover: gradients plus blurred noise, which
+    compresses to roughly what a scanned cover does (~0.1 bytes/pixel)."""
+    from PIL import Image, ImageFilter
+    grad = Image.linear_gradient("L").resize((px, px))
+    noise = Image.effect_noise((px, px), 64).filter(ImageFilter.GaussianBlur(3))
+    img = Image.merge("RGB", (grad, noise, grad.rotate(90)))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+def legacy_thumb(data: bytes, size: tuple[int, int]) -> bytes:
+    """The pipeline mugal26 used before the fast path, kept here as the baseline."""
+    from PIL import Image
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    img.thumbnail(size, Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=72, optimize=True)
+    return buf.getvalue()
+
+def run_one(pipeline: str, cover: Path, runs: int, thumb: int) -> dict:
+    """Runs inside the child process; returns one result row."""
+    import mugal26
+    data = cover.read_bytes()
+    if pipeline == "legacy":
+        fn, arg = legacy_thumb, (thumb, thumb)
+    else:
+        fn, arg = mugal26.make_thumb, mugal26.ArtSettings(size=thumb, optimize=pipeline == "fast")
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        out = fn(data, arg)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024     # ru_maxrss is KB on Linux, bytes on macOS
+    return {
+        "pipeline": pipeline,
+        "source_px": int(cover.stem),
+        "source_kb": round(len(data) / 1024, 1),
+        "thumb_bytes": len(out),
+        "ms_per_image": round(elapsed / runs * 1000, 2),
+        "peak_rss_mb": round(peak * scale / 2**20, 1),
+        "decode_rss_mb": round((peak - base_rss) * scale / 2**20, 1),
+    }
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark thumbnail pipelines")
+    p.add_argument("--sizes", type=int, nargs="+", default=[500, 1500, 3000], metavar="PX")
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--thumb", type=int, default=80, metavar="PX")
+    p.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    p.add_argument("--child", nargs=2, metavar=("PIPELINE", "COVER"), help=argparse.SUPPRESS)
+    p.add_argument("--make-cover", nargs=2, metavar=("PX", "COVER"), help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], Path(args.child[1]), args.runs, args.thumb)))
+        return
+    if args.make_cover:
+        Path(args.make_cover[1]).write_bytes(make_cover(int(args.make_cover[0])))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for px in args.sizes:
+            cover = Path(tmp) / f"{px}.jpg"
+            subprocess.run([sys.executable, __file__, "--make-cover", str(px), str(cover)], check=True)
+            for pipeline in PIPELINES:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", pipeline, str(cover),
+                     "--runs", str(args.runs), "--thumb", str(args.thumb)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                results.append(json.loads(out.strip().splitlines()[-1]))
+
+    if args.json:
+        for r in results:
+            print(json.dumps(r))
+        return
+    print(f"{'source':>16} {'pipeline':>11} {'ms/img':>8} {'peak RSS':>9} {'decode RSS':>11} {'thumb':>7}")
+    for r in results:
+        print(f"{r['source_px']:>6}px {r['source_kb']:>6.0f}KB {r['pipeline']:>11} {r['ms_per_image']:>8.2f} "
+              f"{r['peak_rss_mb']:>7.1f}MB {r['decode_rss_mb']:>9.1f}MB {r['thumb_bytes']:>6}B")
+
+if __name__ == "__main__":
+    main()
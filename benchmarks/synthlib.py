@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+synthlib.py — Synthetic music library generator
+Writes N tracks across M album folders as tiny but valid, fully tagged
+MP3/FLAC/OGG/M4A files. Each file is only its headers and tags (a few KB
+at most), yet reports a realistic duration, so a large library fits in a
+small temp folder. Albums can carry embedded art, a folder cover image,
+both or neither, at a mix of source sizes.
+
+Usage:
+    python benchmarks/synthlib.py DEST [--tracks 2000] [--folders 160]
+                                  [--mix mp3=6,flac=3,ogg=1,m4a=1]
+                                  [--embedded 0.5] [--covers 0.3]
+                                  [--art-sizes 500 1000] [--seed 1]
+
+DEST must not exist yet. Needs mutagen and Pillow (for art). bench_scan.py
+imports make_library() from here.
+"""
+
+import argparse
+import io
+import random
+import struct
+import sys
+from pathlib import Path
+
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import APIC, ID3, TALB, TCON, TDRC, TIT2, TPE1, TPE2, TPOS, TRCK
+from mutagen.mp4 import MP4, MP4Cover
+from mutagen.ogg import OggPage
+from mutagen.oggvorbis import OggVorbis
+
+FORMATS = ("mp3", "flac", "ogg", "m4a")
+DEFAULT_MIX = "mp3=6,flac=3,ogg=1,m4a=1"
+RATE = 44100
+
+WORDS = ("love", "night", "river", "blue", "fire", "city", "dream", "light", "rain",
+         "heart", "road", "summer", "shadow", "gold", "winter", "ocean", "song",
+         "café", "señor", "über", "naïve", "Ørsted", "déjà", "vu", "Mädchen")
+GENRES = ("Rock", "Jazz", "Electronic", "Classical", "Pop", "Hip-Hop", "Folk", "Metal",
+          "Ambient", "Soul", "Blues", "Reggae")
+
+# ── Containers ────────────────────────────────────────────────────────────────
+# Just enough structure for mutagen (and browsers' sniffers) to accept the
+# file and read a duration from its headers; there is no real audio payload.
+
+def mp3_bytes(seconds: float) -> bytes:
+    """MPEG-1 Layer III, 128 kbps: a Xing frame carrying the frame count, then a few empty frames."""
+    header = bytes([0xFF, 0xFB, 0x90, 0x64])
+    frame_len = 144 * 128000 // RATE
+    frames = int(seconds * RATE / 1152)
+    xing = header + b"\0" * 32 + b"Xing" + struct.pack(">II", 1, frames)
+    return xing.ljust(frame_len, b"\0") + (header + b"\0" * (frame_len - 4)) * 3
+
+def flac_bytes(seconds: float) -> bytes:
+    """fLaC marker and a STREAMINFO block (16-bit stereo); tags are added by mutagen."""
+    total = int(seconds * RATE)
+    packed = (RATE << 44) | (1 << 41) | (15 << 36) | total
+    info = struct.pack(">HH", 4096, 4096) + b"\0" * 6 + packed.to_bytes(8, "big") + b"\0" * 16
+    return b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info
+
+def ogg_bytes(seconds: float) -> bytes:
+    """Ogg Vorbis: identification, comment and setup headers, then one page ending at the last sample."""
+    ident = b"\x01vorbis" + struct.pack("<IBIiii", 0, 2, RATE, 0, 128000, 0) + bytes([0xB8, 1])
+    comment = b"\x03vorbis" + struct.pack("<II", 0, 0) + b"\x01"
+    setup = b"\x05vorbis" + b"\0" * 8
+    pages = []
+    for seq, (packets, position, flags) in enumerate((([ident], 0, 0x02),
+                                                       ([comment, setup], 0, 0),
+                                                       ([b"\0"], int(seconds * RATE), 0x04))):
+        page = OggPage()
+        page.serial, page.sequence, page.position = 0x53594E54, seq, position
+        page.packets, page.first = packets, flags & 0x02 != 0
+        page.last = flags & 0x04 != 0
+        pages.append(page.write())
+    return b"".join(pages)
+
+def _box(kind: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+def _full_box(kind: bytes, version: int, flags: int, *payload: bytes) -> bytes:
+    return _box(kind, struct.pack(">I", (version << 24) | flags), *payload)
+
+def m4a_bytes(seconds: float) -> bytes:
+    """ftyp + moov with one AAC-LC sound track (empty sample tables) + an empty mdat."""
+    dur = int(seconds * RATE)
+    matrix = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+    mvhd = _full_box(b"mvhd", 0, 0, struct.pack(">IIII", 0, 0, RATE, dur),
+                     struct.pack(">IH", 0x10000, 0x100), b"\0" * 10, matrix, b"\0" * 24,
+                     struct.pack(">I", 2))
+    tkhd = _full_box(b"tkhd", 0, 7, struct.pack(">IIIII", 0, 0, 1, 0, dur), b"\0" * 8,
+                     struct.pack(">HHHH", 0, 0, 0x100, 0), matrix, struct.pack(">II", 0, 0))
+    mdhd = _full_box(b"mdhd", 0, 0, struct.pack(">IIIIHH", 0, 0, RATE, dur, 0x55C4, 0))
+    hdlr = _full_box(b"hdlr", 0, 0, b"\0" * 4, b"soun", b"\0" * 12, b"SoundHandler\0")
+    asc = bytes([0x12, 0x10])                   # AAC LC, 44.1 kHz, stereo
+    dsi = b"\x05" + bytes([len(asc)]) + asc
+    dcd = (b"\x04" + bytes([13 + len(dsi), 0x40, 0x15]) + b"\0" * 3
+           + struct.pack(">II", 128000, 128000) + dsi)
+    esd = b"\x03" + bytes([len(dcd) + 6]) + b"\0" * 3 + dcd + b"\x06\x01\x02"
+    mp4a = _box(b"mp4a", b"\0" * 6, struct.pack(">H", 1), b"\0" * 8,
+                struct.pack(">HHHHI", 2, 16, 0, 0, RATE << 16), _full_box(b"esds", 0, 0, esd))
+    stbl = _box(b"stbl", _full_box(b"stsd", 0, 0, struct.pack(">I", 1), mp4a),
+                _full_box(b"stts", 0, 0, b"\0" * 4), _full_box(b"stsc", 0, 0, b"\0" * 4),
+                _full_box(b"stsz", 0, 0, b"\0" * 8), _full_box(b"stco", 0, 0, b"\0" * 4))
+    minf = _box(b"minf", _full_box(b"smhd", 0, 0, b"\0" * 4), stbl)
+    moov = _box(b"moov", mvhd, _box(b"trak", tkhd, _box(b"mdia", mdhd, hdlr, minf)))
+    return _box(b"ftyp", b"M4A \0\0\0\0M4A mp42isom\0\0\0\0") + moov + _box(b"mdat")
+
+CONTAINERS = {"mp3": mp3_bytes, "flac": flac_bytes, "ogg": ogg_bytes, "m4a": m4a_bytes}
+
+# ── Tags ──────────────────────────────────────────────────────────────────────
+def tag_file(path: Path, fmt: str, tags: dict, art: bytes | None):
+    """Write tags (title, artist, albumArtist, album, track, tracks, disc, year, genre) and optional JPEG art."""
+    num = f"{tags['track']}/{tags['tracks']}"
+    if fmt == "mp3":
+        id3 = ID3()
+        for frame in (TIT2(encoding=3, text=tags["title"]), TPE1(encoding=3, text=tags["artist"]),
+                      TPE2(encoding=3, text=tags["albumArtist"]), TALB(encoding=3, text=tags["album"]),
+                      TRCK(encoding=3, text=num), TPOS(encoding=3, text=str(tags["disc"])),
+                      TDRC(encoding=3, text=tags["year"]), TCON(encoding=3, text=tags["genre"])):
+            id3.add(frame)
+        if art:
+            id3.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="", data=art))
+        id3.save(path)
+    elif fmt == "m4a":
+        f = MP4(path)
+        f.update({"\xa9nam": [tags["title"]], "\xa9ART": [tags["artist"]],
+                  "aART": [tags["albumArtist"]], "\xa9alb": [tags["album"]],
+                  "trkn": [(tags["track"], tags["tracks"])], "disk": [(tags["disc"], 0)],
+                  "\xa9day": [tags["year"]], "\xa9gen": [tags["genre"]]})
+        if art:
+            f["covr"] = [MP4Cover(art, MP4Cover.FORMAT_JPEG)]
+        f.save()
+    else:
+        f = FLAC(path) if fmt == "flac" else OggVorbis(path)
+        f.update({"title": tags["title"], "artist": tags["artist"], "albumartist": tags["albumArtist"],
+                  "album": tags["album"], "tracknumber": num, "discnumber": str(tags["disc"]),
+                  "date": tags["year"], "genre": tags["genre"]})
+        if art:
+            pic = Picture()
+            pic.type, pic.mime, pic.data = 3, "image/jpeg", art
+            if fmt == "flac":
+                f.add_picture(pic)
+            else:
+                import base64
+                f["metadata_block_picture"] = [base64.b64encode(pic.write()).decode("ascii")]
+        f.save()
+
+# ── Art ───────────────────────────────────────────────────────────────────────
+class CoverMaker:
+    """Distinct photo-like JPEG covers: one textured base per size, with a
+    per-album colour band so no two albums share art (and art_id())."""
+
+    def __init__(self):
+        self._bases = {}
+
+    def __call__(self, px: int, n: int) -> bytes:
+        from PIL import Image, ImageDraw, ImageFilter
+        base = self._bases.get(px)
+        if base is None:
+            grad = Image.linear_gradient("L").resize((px, px))
+            noise = Image.effect_noise((px, px), 64).filter(ImageFilter.GaussianBlur(3))
+            base = self._bases[px] = Image.merge("RGB", (grad, noise, grad.rotate(90)))
+        img = base.copy()
+        hue = (n * 37 % 256, n * 91 % 256, n * 53 % 256)
+        ImageDraw.Draw(img).rectangle((0, px * (n % 7) // 8, px, px * (n % 7 + 1) // 8), fill=hue)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        return buf.getvalue()
+
+# ── Library ───────────────────────────────────────────────────────────────────
+def parse_mix(spec: str) -> dict[str, float]:
+    """"mp3=6,flac=3" → {"mp3": 6.0, "flac": 3.0}; weights need not sum to anything."""
+    mix = {}
+    for part in spec.split(","):
+        fmt, _, weight = part.partition("=")
+        fmt = fmt.strip().lower()
+        if fmt not in CONTAINERS:
+            raise ValueError(f"unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+        mix[fmt] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("format mix is empty")
+    return mix
+
+def make_library(dest: Path, tracks: int, folders: int, mix: dict[str, float] | None = None,
+                 embedded: float = 0.5, covers: float = 0.3, art_sizes: tuple[int, ...] = (500, 1000),
+                 seed: int = 1) -> dict:
+    """Write the library under dest and return a summary of what was made.
+
+    Tracks are spread evenly over the album folders (Artist/Year - Album),
+    about four albums per artist. Each album has one format, drawn from mix
+    by weight; it gets embedded art with probability embedded and a
+    cover.jpg with probability covers, independently, at a size drawn from
+    art_sizes. The same seed always gives the same library.
+    """
+    rnd = random.Random(seed)
+    mix = mix or parse_mix(DEFAULT_MIX)
+    fmts, weights = list(mix), list(mix.values())
+    folders = max(1, min(folders, tracks))
+    cover = CoverMaker()
+    summary = {"tracks": 0, "folders": folders, "bytes": 0, "embedded": 0, "covers": 0,
+               "formats": dict.fromkeys(fmts, 0)}
+    per, extra = divmod(tracks, folders)
+    for a in range(folders):
+        artist = f"Artist {a // 4:04d} {rnd.choice(WORDS).title()}"
+        year = str(rnd.randint(1960, 2025))
+        album = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 3))).title() + f" {a:05d}"
+        folder = dest / artist / f"{year} - {album}"
+        folder.mkdir(parents=True)
+        fmt = rnd.choices(fmts, weights)[0]
+        px = rnd.choice(art_sizes) if art_sizes else 0
+        art = cover(px, a) if px and rnd.random() < embedded else None
+        if px and rnd.random() < covers:
+            (folder / "cover.jpg").write_bytes(art or cover(px, a))
+            summary["covers"] += 1
+        summary["embedded"] += art is not None
+        genre = rnd.choice(GENRES)
+        count = per + (a < extra)
+        for k in range(count):
+            title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 4))).capitalize()
+            path = folder / f"{k + 1:02d} {title}.{fmt}"
+            path.write_bytes(CONTAINERS[fmt](rnd.uniform(90, 420)))
+            tag_file(path, fmt, {"title": title, "artist": artist, "albumArtist": artist,
+                                 "album": album, "track": k + 1, "tracks": count, "disc": 1,
+                                 "year": year, "genre": genre}, art)
+            summary["tracks"] += 1
+            summary["formats"][fmt] += 1
+            summary["bytes"] += path.stat().st_size
+    return summary
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a synthetic music library")
+    p.add_argument("dest", type=Path)
+    p.add_argument("--tracks", type=int, default=2000)
+    p.add_argument("--folders", type=int, default=160, help="Album folders to spread the tracks over")
+    p.add_argument("--mix", default=DEFAULT_MIX, help="Format weights (default %(default)s)")
+    p.add_argument("--embedded", type=float, default=0.5, help="Share of albums with embedded art")
+    p.add_argument("--covers", type=float, default=0.3, help="Share of albums with a cover.jpg")
+    p.add_argument("--art-sizes", type=int, nargs="*", default=[500, 1000], metavar="PX",
+                   help="Source cover sizes to draw from (none: no art at all)")
+    p.add_argument("--seed", type=int, default=1)
+    args = p.parse_args()
+
+    if args.dest.exists():
+        sys.exit(f"{args.dest} already exists")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        sys.exit(str(e))
+    s = make_library(args.dest, args.tracks, args.folders, mix, args.embedded, args.covers,
+                     tuple(args.art_sizes), args.seed)
+    formats = ", ".join(f"{n} {fmt}" for fmt, n in s["formats"].items())
+    print(f"✓ {s['tracks']} tracks ({formats}) in {s['folders']} folders, "
+          f"{s['bytes'] / 2**20:.1f}MB; {s['embedded']} albums with embedded art, "
+          f"{s['covers']} with cover.jpg")
+
+if __name__ == "__main__":
+    main()
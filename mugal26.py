@@ -10,20 +10,40 @@ Usage:
 """
 
 import argparse
+import array
 import base64
+import concurrent.futures
+import ctypes
+import ctypes.util
+import errno
 import fnmatch
+import gzip
 import hashlib
+import http.server
+import itertools
 import json
+import mimetypes
+import os
 import re
+import select
+import struct
 import sys
+import threading
 import time
+import unicodedata
+import urllib.parse
 import webbrowser
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from types import SimpleNamespace
 
 # deps
 try:
     from mutagen import File as MutagenFile
-    from mutagen.id3 import ID3NoHeaderError
+    from mutagen.flac import Picture as FLACPicture, StreamInfo as FLACStreamInfo, VCFLACDict
+    from mutagen.id3 import ID3, ID3NoHeaderError
+    from mutagen.mp3 import MPEGInfo
     HAS_MUTAGEN = True
 except ImportError:
     HAS_MUTAGEN = False
@@ -35,13 +55,42 @@ try:
 except ImportError:
     HAS_PIL = False
 
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
 # ── Constants ─────────────────────────────────────────────────────────────────
 AUDIO_EXTS = {".mp3", ".flac", ".ogg", ".opus", ".m4a", ".aac", ".wav", ".webm"}
 ART_NAMES  = {"cover", "folder", "album", "front", "artwork", "art"}
 ART_EXTS   = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
-THUMB_SIZE = (80, 80)   # px for embedded base64 thumbnails
+THUMB_SIZE = 80         # px (square box) for thumbnails
+THUMB_FORMATS  = {"jpeg": "JPEG", "webp": "WEBP", "avif": "AVIF"}
+THUMB_FILTERS  = ("lanczos", "bicubic", "hamming", "bilinear", "box", "nearest")
+REDUCING_GAP   = 2.0    # decode/pre-shrink to ≥ this × target before the final resample
 DATAFILE   = "audiodata.js"
+VERSIONFILE = "audiodata.version.js"   # tiny; the page loads it first to decide whether it needs DATAFILE
 HTMLFILE   = "index.html"
+THUMBDIR   = "thumbs"                  # --art-mode files/sprites output, next to DATAFILE
+SHARDDIR   = "audiodata"               # --shards output, next to DATAFILE
+SPRITE_COLS = 16                       # sprite sheet grid is SPRITE_COLS × SPRITE_COLS cells
+THUMB_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mugal26" / "thumbs"
+THUMB_CACHE_MB  = 256
+CACHEFILE  = ".audiodata.cache.json"   # incremental scan state, lives next to DATAFILE
+CACHE_VER  = 4
+DELTAFILE  = "audiodata.delta.js"      # --delta: changes since the base DATAFILE
+SEARCHFILE = "audiodata.search.js"     # token index, loaded by the page on first search
+SEARCH_FIELDS = ("title", "artist", "album", "folder")
+DELTASTATE = ".audiodata.base.json"    # --delta: digests of what the base DATAFILE holds
+DELTA_COMPACT = 10                     # % of base tracks the delta may touch before a rebase
+WATCH_DEBOUNCE = 1.0    # s: --watch waits for this long a lull before rewriting
+WATCH_MAX_WAIT = 10.0   # s: …but rewrites at least this often during a long burst
+WATCH_MAX_PENDING = 5000               # touched paths per batch before a full re-scan instead
+WATCH_POLL = 10         # s between walks when inotify is unavailable
+SERVE_PORT = 8026
+COMPRESSED = ((".br", "br"), (".gz", "gzip"))  # --precompress variants, in order of preference
+BROTLI_QUALITY = 9      # 11 is much slower on a large payload for ~3% less
 
 # ── CLI ───────────────────────────────────────────────────────────────────────
 def parse_args():
@@ -62,26 +111,118 @@ def parse_args():
         "--no-art", action="store_true",
         help="Skip embedding base64 album art thumbnails (smaller audiodata.js)"
     )
+    p.add_argument(
+        "--art-mode", choices=("inline", "files", "sprites"), default="inline",
+        help="How thumbnails are shipped: base64 inside audiodata.js (inline), one hashed "
+             f"image per cover under {THUMBDIR}/ (files), or packed sprite sheets under "
+             f"{THUMBDIR}/ (sprites). Default: inline"
+    )
+    p.add_argument(
+        "--data-format", choices=("rows", "columns"), default="rows",
+        help="audiodata.js layout: an object per track (rows), or compact column arrays "
+             "with string tables (columns, much smaller for large libraries). Default: rows"
+    )
+    p.add_argument(
+        "--shards", action="store_true",
+        help=f"Write {DATAFILE} as a small manifest (folder tree + counts) plus one data file "
+             f"per top-level folder under {SHARDDIR}/, loaded by the page only when needed"
+    )
+    p.add_argument(
+        "--delta", action="store_true",
+        help=f"Keep {DATAFILE} as a base and write only what changed since then to {DELTAFILE}; "
+             "the page applies it to its IndexedDB copy record by record"
+    )
+    p.add_argument(
+        "--delta-compact", type=float, default=DELTA_COMPACT, metavar="PCT",
+        help=f"Rewrite the base once the delta touches more than PCT%% of its tracks "
+             f"(default {DELTA_COMPACT})"
+    )
     p.add_argument(
         "--force-rescan", action="store_true",
-        help="Ignore any cached state and re-scan all files"
+        help=f"Ignore any cached state ({CACHEFILE}) and re-scan all files"
     )
     p.add_argument(
         "--exclude", action="append", default=[], metavar="PATTERN",
         help="Glob pattern to exclude (can repeat). E.g. --exclude '*.wav' --exclude 'Podcasts/*'"
     )
+    p.add_argument(
+        "--include", action="append", default=[], metavar="PATTERN",
+        help="Only scan files matching a glob (can repeat). E.g. --include 'Jazz/*' --include '*.flac'"
+    )
+    p.add_argument(
+        "--watch", action="store_true",
+        help=f"After the first scan keep running and rewrite {DATAFILE} whenever files under "
+             "ROOT change, re-scanning only what was touched (Ctrl+C to stop)"
+    )
+    p.add_argument(
+        "--watch-poll", type=float, default=None, metavar="SEC",
+        help="With --watch, walk the tree every SEC seconds instead of using inotify "
+             f"(network shares, non-Linux). Polling is also the fallback, every {WATCH_POLL}s"
+    )
+    p.add_argument(
+        "--serve", nargs="?", type=int, const=SERVE_PORT, default=None, metavar="PORT",
+        help=f"Serve the player over HTTP (default port {SERVE_PORT}) with byte ranges for "
+             "seeking, ETags and precompressed data files; implies --precompress"
+    )
+    p.add_argument(
+        "--bind", default="127.0.0.1", metavar="ADDR",
+        help="Address --serve listens on (default 127.0.0.1; 0.0.0.0 for the whole LAN)"
+    )
+    p.add_argument(
+        "--precompress", action="store_true",
+        help=f"Also write .gz (and .br, with the brotli package) copies of {DATAFILE} and the "
+             "other data scripts, for --serve or a static web server"
+    )
     p.add_argument(
         "--no-html", action="store_true",
         help="Only regenerate audiodata.js, skip writing index.html"
     )
     p.add_argument(
-        "--thumb-size", type=int, default=80, metavar="PX",
-        help="Thumbnail pixel size (square, default 80)"
+        "--thumb-size", type=int, default=THUMB_SIZE, metavar="PX",
+        help=f"Thumbnail pixel size (square, default {THUMB_SIZE})"
+    )
+    p.add_argument(
+        "--thumb-format", choices=tuple(THUMB_FORMATS), default="jpeg",
+        help="Thumbnail image format (default jpeg; webp/avif are smaller at equal quality)"
+    )
+    p.add_argument(
+        "--thumb-quality", type=int, default=72, metavar="Q",
+        help="Thumbnail encoder quality, 1-100 (default 72)"
+    )
+    p.add_argument(
+        "--thumb-resample", choices=THUMB_FILTERS, default="lanczos",
+        help="Resampling filter for the final resize (default lanczos)"
+    )
+    p.add_argument(
+        "--no-thumb-optimize", action="store_true",
+        help="Skip the extra encoder optimisation pass (faster encode, slightly larger thumbnails)"
+    )
+    p.add_argument(
+        "--thumb-cache", default=str(THUMB_CACHE_DIR), metavar="DIR",
+        help="Thumbnail cache shared by all runs and output folders (default: %(default)s)"
+    )
+    p.add_argument(
+        "--thumb-cache-mb", type=int, default=THUMB_CACHE_MB, metavar="MB",
+        help=f"Evict least recently used thumbnails beyond this size (default {THUMB_CACHE_MB})"
+    )
+    p.add_argument(
+        "--no-thumb-cache", action="store_true",
+        help="Neither read nor write the thumbnail cache"
+    )
+    p.add_argument(
+        "--tag-reader", choices=("lite", "full"), default="lite",
+        help="lite: read only the tag header region (plus pictures when art is wanted) for "
+             "MP3/FLAC and use mutagen for everything else; full: always parse the whole "
+             "file with mutagen (default lite)"
     )
     p.add_argument(
         "--min-duration", type=float, default=0, metavar="SEC",
         help="Skip tracks shorter than this many seconds"
     )
+    p.add_argument(
+        "-j", "--jobs", type=int, default=1, metavar="N",
+        help="Parse tags / encode art in N worker processes (0 = one per CPU, default 1)"
+    )
     p.add_argument(
         "-v", "--verbose", action="store_true",
         help="Print each scanned file"
@@ -89,10 +230,170 @@ def parse_args():
     return p.parse_args()
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
-def is_excluded(path: Path, root: Path, patterns: list[str]) -> bool:
-    rel = str(path.relative_to(root)).replace("\\", "/")
-    return any(fnmatch.fnmatch(rel, pat) or fnmatch.fnmatch(path.name, pat)
-               for pat in patterns)
+def compile_globs(patterns: list[str]) -> re.Pattern | None:
+    """Fold fnmatch-style globs into one alternation regex (None if empty)."""
+    if not patterns:
+        return None
+    flags = 0
+    if os.path.normcase("A") == "a":          # case-insensitive filesystem (Windows)
+        flags = re.IGNORECASE
+        patterns = [p.replace("\\", "/") for p in patterns]
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns), flags)
+
+class PathFilter:
+    """--exclude / --include globs, compiled once.
+
+    A pattern matches a file if it matches either the root-relative path or
+    the bare file name, as with fnmatch. Excludes ending in "*" can also
+    rule out a whole directory up front: if one matches "rel/" the trailing
+    star swallows any remainder, so nothing below rel can survive
+    ('Podcasts/*', '*/Live*', …) and the walker never enters it.
+    """
+
+    def __init__(self, exclude: list[str], include: list[str] | None = None):
+        self.exclude = compile_globs(exclude)
+        self.include = compile_globs(include or [])
+        self.prune = compile_globs([p for p in exclude if p.endswith("*")])
+
+    def accepts(self, rel: str, name: str) -> bool:
+        if self.exclude and (self.exclude.match(rel) or self.exclude.match(name)):
+            return False
+        if self.include and not (self.include.match(rel) or self.include.match(name)):
+            return False
+        return True
+
+    def enters(self, rel_dir: str) -> bool:
+        return not (self.prune and self.prune.match(rel_dir + "/"))
+
+def write_atomic(path: Path, data: str | bytes):
+    """Write via a temp file + os.replace, so readers never see half a file."""
+    tmp = path.with_name(path.name + ".tmp")
+    if isinstance(data, str):
+        tmp.write_text(data, encoding="utf-8")
+    else:
+        tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+class ScriptWriter:
+    """A data script written piece by piece, along with its COMPRESSED
+    variants when compress is set.
+
+    Text goes through temp files in ~64 KB pieces; close() renames the script
+    into place and then the variants, so a variant at least as new as the
+    script is current. Without compress any old variants are removed. Used
+    as a context manager, an error leaves the old files untouched.
+    """
+    CHUNK = 1 << 16
+
+    def __init__(self, path: Path, compress: bool = False):
+        self.path = path
+        self.compress = compress
+        self.pending: list[str] = []
+        self.pending_len = 0
+        self.size = 0
+        self.sinks = []                 # (final path, temp path, write, finish)
+        self._open(path, lambda raw: (raw.write, raw.close))
+        if compress:
+            def gz(raw):
+                f = gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=6, mtime=0)
+                return f.write, lambda: (f.close(), raw.close())
+            self._open(path.with_name(path.name + ".gz"), gz)
+            if HAS_BROTLI:
+                def br(raw):
+                    c = brotli.Compressor(quality=BROTLI_QUALITY)
+                    return (lambda data: raw.write(c.process(data)),
+                            lambda: (raw.write(c.finish()), raw.close()))
+                self._open(path.with_name(path.name + ".br"), br)
+
+    def _open(self, final: Path, wrap):
+        tmp = final.with_name(final.name + ".tmp")
+        write, finish = wrap(open(tmp, "wb"))
+        self.sinks.append((final, tmp, write, finish))
+
+    def write(self, text: str):
+        self.pending.append(text)
+        self.pending_len += len(text)
+        if self.pending_len >= self.CHUNK:
+            self._flush()
+
+    def _flush(self):
+        data = "".join(self.pending).encode("utf-8")
+        self.pending, self.pending_len = [], 0
+        self.size += len(data)
+        for _, _, write, _ in self.sinks:
+            write(data)
+
+    def close(self):
+        self._flush()
+        for _, _, _, finish in self.sinks:
+            finish()
+        for final, tmp, _, _ in self.sinks:
+            os.replace(tmp, final)
+        if not self.compress:
+            for suffix, _ in COMPRESSED:
+                self.path.with_name(self.path.name + suffix).unlink(missing_ok=True)
+
+    def abort(self):
+        for _, tmp, _, finish in self.sinks:
+            try:
+                finish()
+            except Exception:
+                pass
+            tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ScriptWriter":
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_script(path: Path, body: str | Iterable[str], compress: bool = False) -> int:
+    """Write a data script from a string or an iterable of pieces (see
+    ScriptWriter); returns its size in bytes."""
+    with ScriptWriter(path, compress) as w:
+        for piece in ([body] if isinstance(body, str) else body):
+            w.write(piece)
+    return w.size
+
+def remove_script(path: Path):
+    """Delete a data script along with any COMPRESSED variants."""
+    for suffix in ("", *(s for s, _ in COMPRESSED)):
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+def iter_audio_files(root: Path, path_filter: PathFilter,
+                     start: str = "") -> Iterator[tuple[str, os.DirEntry]]:
+    """Yield (root-relative path, DirEntry) for every audio file below root
+    (or below its subfolder start).
+
+    Single os.scandir pass: the extension is checked first, DirEntry type
+    info avoids a stat per entry, and directories path_filter rules out are
+    not entered.
+    Symlinked directories are not followed (same as Path.rglob). Order is
+    unspecified.
+    """
+    stack = [start]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            it = os.scandir(os.path.join(root, rel_dir))
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                name = entry.name
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                try:
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTS and entry.is_file():
+                        if path_filter.accepts(rel, name):
+                            yield rel, entry
+                    elif entry.is_dir(follow_symlinks=False):
+                        if path_filter.enters(rel):
+                            stack.append(rel)
+                except OSError:
+                    continue
 
 def find_art(folder: Path) -> Path | None:
     """Return the best cover image in folder, or None."""
@@ -107,26 +408,192 @@ def find_art(folder: Path) -> Path | None:
         return candidates[0][1]
     return None
 
-def image_to_b64(path: Path, size: tuple[int,int]) -> str | None:
+def art_id(data: bytes) -> str:
+    """Content address for an art source image (hash of the undecoded bytes)."""
+    return hashlib.sha1(data).hexdigest()[:12]
+
+@dataclass(frozen=True)
+class ArtSettings:
+    """Everything that decides what a thumbnail looks like.
+
+    One instance is built from the CLI and handed to every art path (tag
+    art, folder art, sprite sheets), so thumbnails and their cache keys
+    always agree.
+    """
+    size: int = THUMB_SIZE
+    format: str = "JPEG"            # Pillow format name, see THUMB_FORMATS
+    quality: int = 72
+    resample: str = "lanczos"
+    optimize: bool = True
+
+    @classmethod
+    def from_args(cls, args) -> "ArtSettings":
+        return cls(size=args.thumb_size, format=THUMB_FORMATS[args.thumb_format],
+                   quality=args.thumb_quality, resample=args.thumb_resample,
+                   optimize=not args.no_thumb_optimize)
+
+    @property
+    def box(self) -> tuple[int, int]:
+        return (self.size, self.size)
+
+    @property
+    def mime(self) -> str:
+        return "image/" + self.format.lower()
+
+    def cache_key(self, src_hash: str) -> tuple:
+        return (src_hash, self.size, self.format, self.quality, self.resample, self.optimize)
+
+    def save(self, img, fp):
+        """Encode img into fp with these settings."""
+        if self.format == "WEBP":
+            img.save(fp, "WEBP", quality=self.quality, method=6 if self.optimize else 4)
+        elif self.format == "AVIF":
+            img.save(fp, "AVIF", quality=self.quality, speed=4 if self.optimize else 8)
+        else:
+            img.save(fp, self.format, quality=self.quality, optimize=self.optimize)
+
+def make_thumb(data: bytes, settings: ArtSettings) -> bytes:
+    """Decode an image and return a thumbnail that fits in settings.box.
+
+    Large JPEGs are decoded DCT-scaled (Image.draft) straight to about
+    REDUCING_GAP × the target instead of at full resolution, and the resize
+    first reduces by an integer factor before resampling. Mode conversion
+    happens on the small image unless the source mode cannot be resampled
+    properly (palette, CMYK, …).
+    """
+    size = settings.box
+    img = Image.open(_io.BytesIO(data))
+    img.draft("RGB", (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+    if img.mode not in ("RGB", "L", "RGBA", "LA"):
+        img = img.convert("RGB")
+    resample = getattr(Image.Resampling, settings.resample.upper())
+    img.thumbnail(size, resample, reducing_gap=REDUCING_GAP)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    buf = _io.BytesIO()
+    settings.save(img, buf)
+    return buf.getvalue()
+
+def image_to_b64(data: bytes, settings: ArtSettings, mime: str = "image/jpeg") -> str | None:
     if not HAS_PIL:
-        # Fallback: raw file without resize
-        try:
-            data = path.read_bytes()
-            mime = "image/jpeg" if path.suffix.lower() in (".jpg",".jpeg") else "image/png"
-            return f"data:{mime};base64,{base64.b64encode(data).decode()}"
-        except Exception:
-            return None
+        # Fallback: raw image without resize
+        return f"data:{mime};base64,{base64.b64encode(data).decode()}"
     try:
-        img = Image.open(path).convert("RGB")
-        img.thumbnail(size, Image.LANCZOS)
-        buf = _io.BytesIO()
-        img.save(buf, "JPEG", quality=72, optimize=True)
-        return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode()
+        return f"data:{settings.mime};base64," + base64.b64encode(make_thumb(data, settings)).decode()
     except Exception:
         return None
 
-def extract_art_from_tags(mut) -> str | None:
-    """Try to pull embedded art from mutagen tags."""
+class ThumbCache:
+    """Disk-backed thumbnail store keyed by (source hash, size, format, quality).
+
+    One encoded image per file, sharded by the first two hex digits of the
+    key. A hit bumps the file's mtime, so evict() can drop the least
+    recently used files once the directory grows past max_bytes. Safe to
+    share between processes: writes go through a temp file + rename.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key: tuple) -> Path:
+        h = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.path / h[:2] / h[2:]
+
+    def get(self, key: tuple) -> bytes | None:
+        f = self._file(key)
+        try:
+            data = f.read_bytes()
+            os.utime(f)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: tuple, data: bytes):
+        f = self._file(key)
+        try:
+            f.parent.mkdir(parents=True, exist_ok=True)
+            tmp = f.with_name(f"{f.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, f)
+        except OSError:
+            pass
+
+    def take_stats(self) -> tuple[int, int]:
+        """Return and reset (hits, misses) — used to hand worker counts to the parent."""
+        stats, self.hits, self.misses = (self.hits, self.misses), 0, 0
+        return stats
+
+    def evict(self) -> int:
+        """Delete least recently used files until under max_bytes; return how many.
+
+        Other runs may be writing or evicting at the same time, so files that
+        vanish mid-walk are skipped, as are their in-flight *.tmp files.
+        """
+        files, total = [], 0
+        try:
+            shards = list(os.scandir(self.path))
+        except OSError:
+            return 0
+        for shard in shards:
+            try:
+                if not shard.is_dir():
+                    continue
+                entries = list(os.scandir(shard.path))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+THUMB_CACHE: ThumbCache | None = None   # set by main() / pool worker initializer
+
+def add_art(data: bytes, settings: ArtSettings, art: dict, mime: str = "image/jpeg") -> str | None:
+    """Register a source image in the art table and return its ID.
+
+    The ID is taken from the raw bytes, so an image that is already in the
+    table (same picture embedded in every track of an album, say) is never
+    decoded again; neither is one found in THUMB_CACHE from an earlier run.
+    """
+    aid = art_id(data)
+    if aid in art:
+        return aid
+    key = settings.cache_key(hashlib.sha1(data).hexdigest())
+    cached = THUMB_CACHE.get(key) if THUMB_CACHE and HAS_PIL else None
+    if cached is not None:
+        art[aid] = f"data:{settings.mime};base64," + base64.b64encode(cached).decode()
+        return aid
+    uri = image_to_b64(data, settings, mime)
+    if uri is None:
+        return None
+    if THUMB_CACHE and HAS_PIL:
+        THUMB_CACHE.put(key, _decode_data_uri(uri)[1])
+    art[aid] = uri
+    return aid
+
+def extract_art_from_tags(mut, art: dict, settings: ArtSettings) -> str | None:
+    """Try to pull embedded art from mutagen tags; returns an art ID."""
     if not HAS_PIL:
         return None
     try:
@@ -134,24 +601,116 @@ def extract_art_from_tags(mut) -> str | None:
         if hasattr(mut, "tags") and mut.tags:
             for key in mut.tags.keys():
                 if key.startswith("APIC"):
-                    apic = mut.tags[key]
-                    img = Image.open(_io.BytesIO(apic.data)).convert("RGB")
-                    img.thumbnail(THUMB_SIZE, Image.LANCZOS)
-                    buf = _io.BytesIO()
-                    img.save(buf, "JPEG", quality=72, optimize=True)
-                    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode()
+                    return add_art(mut.tags[key].data, settings, art)
         # FLAC / Vorbis pictures
         if hasattr(mut, "pictures") and mut.pictures:
-            pic = mut.pictures[0]
-            img = Image.open(_io.BytesIO(pic.data)).convert("RGB")
-            img.thumbnail(THUMB_SIZE, Image.LANCZOS)
-            buf = _io.BytesIO()
-            img.save(buf, "JPEG", quality=72, optimize=True)
-            return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode()
+            return add_art(mut.pictures[0].data, settings, art)
     except Exception:
         pass
     return None
 
+# ── Lite tag reader ───────────────────────────────────────────────────────────
+_ID3_FRAME_ID = re.compile(rb"[A-Z0-9]{4}")
+
+def _syncsafe(b: bytes) -> int:
+    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+
+def _lite_mp3(f, want_art: bool) -> SimpleNamespace | None:
+    """ID3v2.3/2.4 frames + MPEG stream info, skipping APIC bodies unless wanted.
+
+    Only the tag region, the first audio frames and the last 128 bytes are
+    read. Returns None for anything unusual (no ID3v2 header, v2.2,
+    unsynchronised or extended header, odd frame IDs, v2.4 sizes written as
+    plain integers, padding that is not all zeros, an ID3v1 tag mutagen
+    would merge in) so the caller can fall back to mutagen.
+    """
+    hdr = f.read(10)
+    if len(hdr) < 10 or hdr[:3] != b"ID3" or hdr[3] not in (3, 4) or hdr[5] & 0xC0:
+        return None
+    v4 = hdr[3] == 4
+    end = 10 + _syncsafe(hdr[6:10])
+    frames, pos = [], 10
+    while pos + 10 <= end:
+        fh = f.read(10)
+        if len(fh) < 10:
+            return None
+        if fh[0] == 0:                                  # padding runs to the end of the tag
+            if fh.count(0) != 10 or f.read(end - pos - 10).count(0) != end - pos - 10:
+                return None
+            break
+        if not _ID3_FRAME_ID.fullmatch(fh[:4]) or (v4 and any(b & 0x80 for b in fh[4:8])):
+            return None
+        size = _syncsafe(fh[4:8]) if v4 else int.from_bytes(fh[4:8], "big")
+        if pos + 10 + size > end:
+            return None
+        if fh[:4] == b"APIC" and not want_art:
+            f.seek(size, 1)
+        else:
+            frames.append(fh + f.read(size))
+        pos += 10 + size
+    body = b"".join(frames)
+    n = len(body)
+    blob = hdr[:5] + b"\0" + bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F]) + body
+    f.seek(0, 2)
+    if f.tell() >= 128:
+        f.seek(-128, 2)
+        if f.read(3) == b"TAG":
+            return None
+    tags = ID3(_io.BytesIO(blob))
+    info = MPEGInfo(f, end + (10 if hdr[5] & 0x10 else 0))
+    return SimpleNamespace(tags=tags, info=info)
+
+def _lite_flac(f, want_art: bool) -> SimpleNamespace | None:
+    """FLAC metadata blocks only; PICTURE blocks are skipped unless wanted."""
+    if f.read(4) != b"fLaC":
+        return None
+    info, tags, pictures = None, None, []
+    last = False
+    while not last:
+        bh = f.read(4)
+        if len(bh) < 4:
+            return None
+        last, kind, size = bool(bh[0] & 0x80), bh[0] & 0x7F, int.from_bytes(bh[1:4], "big")
+        if kind == 0:
+            info = FLACStreamInfo(f.read(size))
+        elif kind == 4:
+            tags = VCFLACDict(f.read(size))
+        elif kind == 6 and want_art:
+            pictures.append(FLACPicture(f.read(size)))
+        else:
+            f.seek(size, 1)
+    if info is None:
+        return None
+    return SimpleNamespace(tags=tags, info=info, pictures=pictures)
+
+LITE_READERS = {".mp3": _lite_mp3, ".flac": _lite_flac}
+
+def read_tags(path: Path, want_art: bool, lite: bool = True, fileobj=None):
+    """Open path for tag extraction: a lite reader where one exists, else mutagen.
+
+    Lite results expose the attributes scan_file() uses (tags, info.length,
+    pictures) without pulling picture data or the rest of the file. Any
+    lite failure falls back to the full MutagenFile parse. fileobj, if
+    given, is read instead of opening path (used to meter I/O).
+    """
+    reader = LITE_READERS.get(path.suffix.lower()) if lite else None
+    if reader:
+        try:
+            if fileobj is not None:
+                fileobj.seek(0)
+                mut = reader(fileobj, want_art)
+            else:
+                with open(path, "rb") as f:
+                    mut = reader(f, want_art)
+            if mut is not None:
+                return mut
+        except Exception:
+            pass
+    if fileobj is not None:
+        fileobj.seek(0)
+        return MutagenFile(fileobj, easy=False)
+    return MutagenFile(path, easy=False)
+
 def get_tag(mut, *keys, default="") -> str:
     """Pull first available tag value as a clean string."""
     if not mut or not mut.tags:
@@ -185,11 +744,31 @@ def get_int_tag(mut, *keys, default=0) -> int:
             pass
     return default
 
-def scan_file(path: Path, root: Path, embed_art: bool, thumb_size: int,
-              folder_art_cache: dict, min_duration: float) -> dict | None:
-    """Return track metadata dict or None if not audio / too short."""
+def folder_art(folder: Path, settings: ArtSettings, art: dict) -> str | None:
+    """Art ID for the best cover image in folder, or None."""
+    art_file = find_art(folder)
+    if not art_file:
+        return None
+    try:
+        data = art_file.read_bytes()
+    except OSError:
+        return None
+    mime = "image/jpeg" if art_file.suffix.lower() in (".jpg",".jpeg") else "image/png"
+    return add_art(data, settings, art, mime)
+
+def scan_file(path: Path, root: Path, embed_art: bool, art_settings: ArtSettings,
+              folder_art_cache: dict | None, min_duration: float,
+              art: dict, lite_tags: bool = True) -> dict | None:
+    """Return track metadata dict or None if not audio / too short.
+
+    The track's "art" is an ID into the art table, which gains an entry
+    for any image not seen before. With folder_art_cache=None the
+    folder-image fallback is left to the caller, so tracks without embedded
+    art come back with art=None.
+    """
     rel = path.relative_to(root)
     rel_str = str(rel).replace("\\", "/")
+    folder_rel = str(rel.parent).replace("\\", "/") if rel.parent.parts else ""   # root tracks: ""
 
     if not HAS_MUTAGEN:
         # Bare minimum without mutagen
@@ -205,11 +784,11 @@ def scan_file(path: Path, root: Path, embed_art: bool, thumb_size: int,
             "genre": "",
             "duration": 0,
             "art": None,
-            "folder": str(rel.parent).replace("\\", "/"),
+            "folder": folder_rel,
         }
 
     try:
-        mut = MutagenFile(path, easy=False)
+        mut = read_tags(path, want_art=embed_art, lite=lite_tags)
     except Exception:
         return None
 
@@ -220,8 +799,6 @@ def scan_file(path: Path, root: Path, embed_art: bool, thumb_size: int,
     if duration < min_duration:
         return None
 
-    folder_rel = str(rel.parent).replace("\\", "/")
-
     # ── Tags ──────────────────────────────────────────────────────────────────
     # Try easy tags first (mutagen easy=False, so we handle both ID3 and Vorbis)
     title       = get_tag(mut, "TIT2", "title",       "\xa9nam", "TITLE",       default=path.stem)
@@ -237,18 +814,15 @@ def scan_file(path: Path, root: Path, embed_art: bool, thumb_size: int,
     year = re.sub(r"[^\d].*", "", str(year))[:4] if year else ""
 
     # ── Art ───────────────────────────────────────────────────────────────────
-    art = None
+    art_ref = None
     if embed_art:
-        ts = (thumb_size, thumb_size)
-        THUMB_SIZE = ts
         # 1. embedded tags
-        art = extract_art_from_tags(mut)
+        art_ref = extract_art_from_tags(mut, art, art_settings)
         # 2. folder image (cached per folder)
-        if not art:
+        if not art_ref and folder_art_cache is not None:
             if folder_rel not in folder_art_cache:
-                art_file = find_art(path.parent)
-                folder_art_cache[folder_rel] = image_to_b64(art_file, ts) if art_file else None
-            art = folder_art_cache[folder_rel]
+                folder_art_cache[folder_rel] = folder_art(path.parent, art_settings, art)
+            art_ref = folder_art_cache[folder_rel]
 
     return {
         "path":        rel_str,
@@ -261,10 +835,115 @@ def scan_file(path: Path, root: Path, embed_art: bool, thumb_size: int,
         "year":        year,
         "genre":       genre,
         "duration":    round(duration, 2),
-        "art":         art,
+        "art":         art_ref,
         "folder":      folder_rel,
     }
 
+# ── Scan cache ────────────────────────────────────────────────────────────────
+def file_sig(st: os.stat_result) -> list[int]:
+    """Cheap change detector for a file: (size, mtime_ns, inode)."""
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+class FolderCovers(dict):
+    """Root-relative folder → signature of the image folder_art() would use
+    there ([name, *file_sig()], or [] for none), looked up once per run."""
+
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = root
+
+    def __missing__(self, folder: str) -> list:
+        try:
+            art_file = find_art(self.root / folder)
+            sig = [art_file.name, *file_sig(art_file.stat())] if art_file else []
+        except OSError:
+            sig = []
+        self[folder] = sig
+        return sig
+
+    def needed(self, track: dict | None, folder_art_cache: dict) -> list | None:
+        """The folder's signature if track's art came from (or would come
+        from) a folder image, else None."""
+        if track is None or track["art"] not in (None, folder_art_cache.get(track["folder"])):
+            return None
+        return self[track["folder"]]
+
+class ScanCache:
+    """On-disk map of relative path → (file signature, scanned track dict),
+    plus the art table those track dicts refer to.
+
+    Entries are only reused when the signature matches and the scan settings
+    that shape a track dict (art, thumb size, …) are unchanged; otherwise the
+    whole cache is treated as empty. Tracks without embedded art also keep
+    their folder's cover signature, so adding or replacing a cover image
+    re-scans them.
+    """
+
+    def __init__(self, path: Path, settings: dict):
+        self.path = path
+        self.settings = settings
+        self.entries: dict[str, dict] = {}
+        self.art: dict[str, str] = {}
+        self.seen: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> "ScanCache":
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self
+        if data.get("schema") == CACHE_VER and data.get("settings") == self.settings:
+            self.entries = data.get("files", {})
+            self.art = data.get("art", {})
+        return self
+
+    def lookup(self, rel: str, sig: list[int], covers: FolderCovers) -> tuple[bool, dict | None]:
+        """Return (hit, track). A hit may carry None for files that failed to scan."""
+        self.seen.add(rel)
+        entry = self.entries.get(rel)
+        if (entry is not None and entry["sig"] == sig
+                and ("cover" not in entry or entry["cover"] == covers[entry["track"]["folder"]])):
+            self.hits += 1
+            return True, entry["track"]
+        self.misses += 1
+        return False, None
+
+    def store(self, rel: str, sig: list[int], track: dict | None, cover: list | None = None):
+        self.seen.add(rel)
+        self.entries[rel] = {"sig": sig, "track": track}
+        if cover is not None:
+            self.entries[rel]["cover"] = cover
+
+    def prune(self) -> int:
+        """Drop entries for files not seen in this scan; return how many."""
+        gone = [rel for rel in self.entries if rel not in self.seen]
+        for rel in gone:
+            del self.entries[rel]
+        return len(gone)
+
+    def save(self):
+        """Write the cache atomically, streamed like the data scripts (iter_json)."""
+        art = referenced_art((e["track"] for e in self.entries.values()), self.art)
+        write_script(self.path, iter_json(
+            {"schema": CACHE_VER, "settings": self.settings,
+             "files": JSONObject(self.entries.items()), "art": JSONObject(art.items())}))
+
+def referenced_art(tracks, art: dict) -> dict:
+    """Subset of the art table that some track actually points at, in track order."""
+    used = dict.fromkeys(t["art"] for t in tracks if t and t["art"])
+    return {aid: art[aid] for aid in used if aid in art}
+
+def cache_settings(args) -> dict:
+    """Scan options that change what scan_file() returns for the same file."""
+    return {
+        "art":          not args.no_art,
+        "thumbs":       asdict(ArtSettings.from_args(args)),
+        "min_duration": args.min_duration,
+        "mutagen":      HAS_MUTAGEN,
+        "pil":          HAS_PIL,
+    }
+
 # ── Tree builder ──────────────────────────────────────────────────────────────
 def build_folder_tree(tracks: list[dict]) -> dict:
     """Build nested folder structure from flat track list."""
@@ -289,63 +968,732 @@ def build_folder_tree(tracks: list[dict]) -> dict:
     return folders
 
 # ── Main scan ─────────────────────────────────────────────────────────────────
-def scan(root: Path, args) -> list[dict]:
-    tracks = []
-    folder_art_cache = {}
-    all_files = sorted(root.rglob("*"))
-    audio_files = [f for f in all_files
-                   if f.is_file()
-                   and f.suffix.lower() in AUDIO_EXTS
-                   and not is_excluded(f, root, args.exclude)]
-
-    total = len(audio_files)
-    if not total:
-        print("⚠  No audio files found.", file=sys.stderr)
-        return []
-
-    print(f"Scanning {total} audio files…")
-    t0 = time.time()
-
-    for i, f in enumerate(audio_files):
-        if args.verbose:
-            print(f"  [{i+1}/{total}] {f.relative_to(root)}")
-        else:
-            pct = int(50 * (i + 1) / total)
-            bar = "█" * pct + "░" * (50 - pct)
-            print(f"\r  [{bar}] {i+1}/{total}", end="", flush=True)
-
-        track = scan_file(
+class _WorkerArt(dict):
+    """Art table for one unit of pool work.
+
+    Holds only the entries created by this job (they are shipped back to the
+    parent), but also reports IDs this worker process already shipped as
+    present, so repeated images are not decoded again.
+    """
+    shipped: set[str] = set()
+
+    def __contains__(self, aid):
+        return dict.__contains__(self, aid) or aid in self.shipped
+
+    def ship(self) -> dict:
+        self.shipped.update(self)
+        return dict(self)
+
+def _init_worker(thumb_cache: ThumbCache | None):
+    global THUMB_CACHE
+    THUMB_CACHE = thumb_cache
+
+def _thumb_stats() -> tuple[int, int]:
+    return THUMB_CACHE.take_stats() if THUMB_CACHE else (0, 0)
+
+def _scan_chunk(paths: list[Path], root: Path, opts: dict) -> tuple[list[dict | None], dict, tuple]:
+    """Worker entry point: scan a run of files, leaving folder art to the parent."""
+    art = _WorkerArt()
+    tracks = [scan_file(f, root, folder_art_cache=None, art=art, **opts) for f in paths]
+    return tracks, art.ship(), _thumb_stats()
+
+def _folder_art_job(folder: Path, settings: ArtSettings) -> tuple[str | None, dict, tuple]:
+    art = _WorkerArt()
+    aid = folder_art(folder, settings, art)
+    return aid, art.ship(), _thumb_stats()
+
+def _add_thumb_stats(stats: tuple[int, int]):
+    if THUMB_CACHE:
+        THUMB_CACHE.hits += stats[0]
+        THUMB_CACHE.misses += stats[1]
+
+def _progress(done: int, total: int, label):
+    if label is not None:
+        print(f"  [{done}/{total}] {label}")
+    else:
+        pct = int(50 * done / total)
+        bar = "█" * pct + "░" * (50 - pct)
+        print(f"\r  [{bar}] {done}/{total}", end="", flush=True)
+
+def scan_parallel(files: list[Path], root: Path, args, jobs: int, settings: ArtSettings,
+                  folder_art_cache: dict, art: dict) -> list[dict | None]:
+    """scan_file() over files in a process pool; results come back in input order.
+
+    Files are handed out in contiguous chunks so an album usually lands on one
+    worker. Folder art is resolved afterwards, once per folder, in the same
+    pool and merged into the shared folder_art_cache. New art table entries
+    from the workers are merged into art.
+    """
+    opts = dict(embed_art=not args.no_art, art_settings=settings,
+                min_duration=args.min_duration, lite_tags=args.tag_reader == "lite")
+    total = len(files)
+    size = max(1, min(64, total // (jobs * 4) or 1))
+    chunks = [files[i:i + size] for i in range(0, total, size)]
+    results: list[dict | None] = [None] * total
+    done = 0
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(THUMB_CACHE,)) as pool:
+        futures = {pool.submit(_scan_chunk, chunk, root, opts): i * size
+                   for i, chunk in enumerate(chunks)}
+        for fut in concurrent.futures.as_completed(futures):
+            start = futures[fut]
+            chunk_tracks, chunk_art, stats = fut.result()
+            art.update(chunk_art)
+            _add_thumb_stats(stats)
+            for j, track in enumerate(chunk_tracks):
+                results[start + j] = track
+                done += 1
+                _progress(done, total, files[start + j].relative_to(root) if args.verbose else None)
+
+        if not args.no_art and HAS_MUTAGEN:
+            need = sorted({t["folder"] for t in results if t and t["art"] is None} - folder_art_cache.keys())
+            jobs_out = pool.map(_folder_art_job, [root / f for f in need], [settings] * len(need))
+            for folder, (aid, folder_art_new, stats) in zip(need, jobs_out):
+                folder_art_cache[folder] = aid
+                art.update(folder_art_new)
+                _add_thumb_stats(stats)
+            for t in results:
+                if t and t["art"] is None:
+                    t["art"] = folder_art_cache[t["folder"]]
+    return results
+
+def scan_files(files: list[Path], root: Path, args, jobs: int, art_settings: ArtSettings,
+               folder_art_cache: dict, art: dict) -> list[dict | None]:
+    """scan_file() over files, in a pool when jobs > 1; results in input order."""
+    if jobs > 1 and len(files) > 1:
+        return scan_parallel(files, root, args, jobs, art_settings, folder_art_cache, art)
+    scanned = []
+    for n, f in enumerate(files):
+        _progress(n + 1, len(files), f.relative_to(root) if args.verbose else None)
+        scanned.append(scan_file(
             f, root,
             embed_art=not args.no_art,
-            thumb_size=args.thumb_size,
+            art_settings=art_settings,
             folder_art_cache=folder_art_cache,
             min_duration=args.min_duration,
-        )
+            art=art,
+            lite_tags=args.tag_reader == "lite",
+        ))
+    return scanned
+
+def scan(root: Path, args, cache: ScanCache) -> Iterator[dict]:
+    """Scan root, yielding track dicts in no particular order: unchanged files
+    straight from cache during the walk, then the re-scanned ones. Art they
+    refer to is added to cache.art."""
+    folder_art_cache = {}
+    art_settings = ArtSettings.from_args(args)
+    covers = FolderCovers(root)
+
+    # Walk + cache pass: anything unchanged since the last run is taken as-is.
+    t0 = time.time()
+    count = 0
+    todo: list[tuple[str, list[int]]] = []
+    total = 0
+    path_filter = PathFilter(args.exclude, args.include)
+    for rel, entry in iter_audio_files(root, path_filter):
+        total += 1
+        try:
+            sig = file_sig(entry.stat())
+        except OSError:
+            continue
+        hit, track = cache.lookup(rel, sig, covers)
+        if hit:
+            if track:
+                count += 1
+                yield track
+            continue
+        todo.append((rel, sig))
+
+    if not total:
+        print("⚠  No audio files found.", file=sys.stderr)
+        return
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    msg = f"Scanning {len(todo)} audio files"
+    if len(todo) < total:
+        msg += f" ({total - len(todo)} unchanged)"
+    if jobs > 1 and len(todo) > 1:
+        msg += f" with {jobs} jobs"
+    print(msg + "…")
+
+    scanned = scan_files([root / rel for rel, _ in todo], root, args, jobs,
+                         art_settings, folder_art_cache, cache.art)
+    for (rel, sig), track in zip(todo, scanned):
+        cache.store(rel, sig, track, None if args.no_art else covers.needed(track, folder_art_cache))
         if track:
-            tracks.append(track)
+            count += 1
+            yield track
 
     elapsed = time.time() - t0
-    print(f"\n✓ Scanned {len(tracks)} tracks in {elapsed:.1f}s")
-    return tracks
+    print(("\n" if todo else "") + f"✓ Scanned {count} tracks in {elapsed:.1f}s")
+
+# ── Write art ─────────────────────────────────────────────────────────────────
+def _decode_data_uri(uri: str) -> tuple[str, bytes]:
+    head, _, b64 = uri.partition(",")
+    return head[5:].split(";")[0], base64.b64decode(b64)
+
+def _art_ext(mime: str) -> str:
+    return {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp",
+            "image/gif": ".gif", "image/avif": ".avif"}.get(mime, ".img")
+
+_THUMB_NAME_RE = re.compile(r"(sprite-)?[0-9a-f]{12}\.\w+(\.tmp)?")   # .tmp: left by an interrupted run
+_SHARD_NAME_RE = re.compile(r"shard-\d{4}-[0-9a-f]{10}\.js(\.gz|\.br)?")
+
+def _sync_dir(out_sub: Path, keep: set[str], pattern: re.Pattern):
+    """Remove files left in an output subfolder by earlier runs that are no longer referenced.
+
+    Only names matching pattern (the ones this script writes) are touched:
+    with the output in ROOT, the subfolder may hold the library's own files.
+    """
+    for f in out_sub.iterdir():
+        if f.name not in keep and pattern.fullmatch(f.name) and f.is_file():
+            f.unlink()
+
+def write_art_files(art: dict, out_dir: Path) -> dict:
+    """One file per art ID under THUMBDIR/; returns ID → relative URL.
+
+    Files are named by the hash of the thumbnail itself, so new thumbnail
+    settings give new URLs (and a new art_version()). They are written with
+    write_atomic(), so a file that exists is complete and can be kept.
+    """
+    thumb_dir = out_dir / THUMBDIR
+    thumb_dir.mkdir(exist_ok=True)
+    table = {}
+    for aid, uri in art.items():
+        mime, data = _decode_data_uri(uri)
+        name = art_id(data) + _art_ext(mime)
+        f = thumb_dir / name
+        if not f.exists():              # content-addressed: an existing file is current
+            write_atomic(f, data)
+        table[aid] = f"{THUMBDIR}/{name}"
+    _sync_dir(thumb_dir, {u.rsplit("/", 1)[1] for u in table.values()}, _THUMB_NAME_RE)
+    return table
+
+def write_art_sprites(art: dict, out_dir: Path, settings: ArtSettings) -> tuple[dict, list]:
+    """Pack thumbnails into sprite sheets under THUMBDIR/.
+
+    Returns (ID → [sheet, x, y, w, h], [[sheet URL, width, height], …]).
+    Sheet names hash the IDs they contain and the art settings, so a
+    sheet's URL changes exactly when its contents do and the browser cache
+    can be trusted.
+    """
+    thumbs = {}
+    for aid, uri in art.items():
+        try:
+            img = Image.open(_io.BytesIO(_decode_data_uri(uri)[1]))
+            img.load()
+            thumbs[aid] = img.convert("RGB") if img.mode != "RGB" else img
+        except Exception:
+            continue
+    thumb_dir = out_dir / THUMBDIR
+    thumb_dir.mkdir(exist_ok=True)
+    cell = max((max(img.size) for img in thumbs.values()), default=1)
+    per_sheet = SPRITE_COLS * SPRITE_COLS
+    ids = list(thumbs)
+    table, sheets = {}, []
+    for n, first in enumerate(range(0, len(ids), per_sheet)):
+        batch = ids[first:first + per_sheet]
+        cols = min(SPRITE_COLS, len(batch))
+        rows = -(-len(batch) // cols)
+        sheet = Image.new("RGB", (cols * cell, rows * cell), (0, 0, 0))
+        for k, aid in enumerate(batch):
+            img = thumbs[aid]
+            x, y = (k % cols) * cell, (k // cols) * cell
+            sheet.paste(img, (x, y))
+            table[aid] = [n, x, y, img.size[0], img.size[1]]
+        key = repr((batch, asdict(settings))).encode()
+        name = "sprite-" + hashlib.md5(key).hexdigest()[:12] + _art_ext(settings.mime)
+        if not (thumb_dir / name).exists():
+            buf = _io.BytesIO()
+            settings.save(sheet, buf)
+            write_atomic(thumb_dir / name, buf.getvalue())
+        sheets.append([f"{THUMBDIR}/{name}", sheet.size[0], sheet.size[1]])
+    _sync_dir(thumb_dir, {s[0].rsplit("/", 1)[1] for s in sheets}, _THUMB_NAME_RE)
+    return table, sheets
+
+def write_art(art: dict, out_dir: Path, mode: str, settings: ArtSettings) -> tuple[dict, list]:
+    """Lay out the art table for the payload; returns (art table, sprite sheets)."""
+    if mode == "sprites" and not HAS_PIL:
+        print("⚠  Pillow not installed — writing thumbnail files instead of sprites", file=sys.stderr)
+        mode = "files"
+    if mode == "files":
+        table = write_art_files(art, out_dir)
+        print(f"✓ Wrote {len(table)} thumbnails to {THUMBDIR}/")
+        return table, []
+    if mode == "sprites":
+        table, sheets = write_art_sprites(art, out_dir, settings)
+        print(f"✓ Wrote {len(table)} thumbnails in {len(sheets)} sprite sheets to {THUMBDIR}/")
+        return table, sheets
+    return art, []
 
 # ── Write audiodata.js ────────────────────────────────────────────────────────
-def write_datafile(tracks: list[dict], out_dir: Path, root: Path) -> str:
-    """Write audiodata.js and return its version hash."""
+STRING_FIELDS = ("artist", "album", "albumArtist", "genre", "year", "art")
+PLAIN_FIELDS  = ("title", "track", "disc", "duration", "fp")
+FP_FIELDS     = ("path", "folder", "title", "track", "disc", "duration", *STRING_FIELDS)
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+class JSONArray:
+    """An array for iter_json() to stream from any iterable, BATCH items per piece."""
+    BATCH = 1024
+
+    def __init__(self, items: Iterable):
+        self.items = items
+
+class JSONObject(JSONArray):
+    """An object for iter_json() to stream from (key, value) pairs, BATCH members per piece."""
+
+def iter_json(obj) -> Iterator[str]:
+    """The text json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    gives, in pieces.
+
+    Dicts are walked member by member, a JSONArray or JSONObject a batch at
+    a time; a callable stands for whatever it returns once it is reached, so
+    a value can depend on what was streamed before it. Anything else is one
+    piece.
+    """
+    if isinstance(obj, dict):
+        sep = "{"
+        for key, value in obj.items():
+            yield f"{sep}{_encode(key)}:"
+            sep = ","
+            yield from iter_json(value)
+        yield "}" if sep == "," else "{}"
+    elif isinstance(obj, JSONArray):
+        pack, (start, end) = (dict, "{}") if isinstance(obj, JSONObject) else (list, "[]")
+        items, sep = iter(obj.items), start
+        while batch := pack(itertools.islice(items, JSONArray.BATCH)):
+            yield sep + _encode(batch)[1:-1]
+            sep = ","
+        yield end if sep == "," else start + end
+    elif callable(obj):
+        yield from iter_json(obj())
+    else:
+        yield _encode(obj)
+
+def script_pieces(head: str, obj, tail: str = ";") -> Iterator[str]:
+    """A data script assigning (or passing) obj, for write_script()."""
+    yield head
+    yield from iter_json(obj)
+    yield tail
+
+def columnar_tracks(tracks: Iterable[dict]) -> dict:
+    """Column-oriented, dictionary-encoded form of the track list (payload format 2).
+
+    - columns[f]  one array per field, index = track number
+    - strings[f]  string table for STRING_FIELDS; their columns hold indices
+                  (entry 0 is always "", which also stands for a missing art ID)
+    - folders     [parentIndex, segment] per folder; entry 0 is the root ("")
+    - name        file name; path = folder path + "/" + name
+
+    Nothing is materialised: iter_json() walks tracks once per column, and
+    the string and folder tables fill up on the way, which is why they are
+    callables placed after columns.
+    """
+    strings = {f: {"": 0} for f in STRING_FIELDS}
+    folders = {"": 0}
+    folder_rows = [[-1, ""]]
+
+    def folder_index(path: str) -> int:
+        idx = folders.get(path)
+        if idx is None:
+            parent, _, seg = path.rpartition("/")
+            parent_idx = folder_index(parent)
+            idx = folders[path] = len(folder_rows)
+            folder_rows.append([parent_idx, seg])
+        return idx
+
+    def column(f: str) -> Iterator:
+        if f == "name":
+            return (t["path"].rsplit("/", 1)[-1] for t in tracks)
+        if f == "folder":
+            return (folder_index(t["folder"]) for t in tracks)
+        if f in STRING_FIELDS:
+            table = strings[f]
+            return (table.setdefault(t[f] or "", len(table)) for t in tracks)
+        return (t[f] for t in tracks)
+
+    return {
+        "columns": {f: JSONArray(column(f)) for f in ("name", "folder", *PLAIN_FIELDS, *STRING_FIELDS)},
+        "strings": lambda: {f: list(table) for f, table in strings.items()},
+        "folders": lambda: folder_rows,
+    }
+
+def library_order(t: dict) -> tuple:
+    """Display order: folder (by path segment, caseless first) → disc → track → title → path.
+
+    Comparing whole segments keeps every folder's subtree contiguous, which
+    is what lets folder_tree() describe a folder as one [start, end) range.
+    The path makes the order total, so a delta rebuilds it exactly.
+    """
+    return (_folder_key(t["folder"]), *_track_key(t))
+
+def _folder_key(folder: str) -> list:
+    return [(seg.casefold(), seg) for seg in folder.split("/")] if folder else []
+
+def _track_key(t: dict) -> tuple:
+    return t["disc"] or 0, t["track"] or 0, t["title"].casefold(), t["path"]
+
+def sort_library(tracks: Iterable[dict]) -> list[dict]:
+    """sorted(tracks, key=library_order) without a folder key per track.
+
+    Folders are ordered once each and then the tracks inside each folder, so
+    only one folder's worth of track keys exists at a time.
+    """
+    by_folder: dict[str, list[dict]] = {}
+    for t in tracks:
+        by_folder.setdefault(t["folder"], []).append(t)
+    ordered: list[dict] = []
+    for folder in sorted(by_folder, key=_folder_key):
+        ordered += sorted(by_folder[folder], key=_track_key)
+    return ordered
+
+def track_rows(tracks: Iterable[dict], data_format: str) -> dict:
+    """Payload fields holding the tracks themselves, in either data format, for iter_json()."""
+    if data_format == "columns":
+        return {"format": 2, **columnar_tracks(tracks)}
+    return {"tracks": JSONArray(tracks)}
+
+def folder_tree(tracks: list[dict]) -> tuple[list[list], int]:
+    """Folder tree with the track range of every folder.
+
+    tracks must be in library_order(). Returns ([[parentIndex, segment,
+    start, end], …], tracks directly in root); parentIndex -1 marks a
+    top-level folder and [start, end) covers the folder and its subfolders.
+    Root tracks sort first, so they are [0, rootCount).
+    """
+    index: dict[str, int] = {}
+    rows: list[list] = []
+    root_count = 0
+    for n, t in enumerate(tracks):
+        if not t["folder"]:
+            root_count += 1
+            continue
+        parent, path = -1, ""
+        for seg in t["folder"].split("/"):
+            path = f"{path}/{seg}" if path else seg
+            i = index.get(path)
+            if i is None:
+                i = index[path] = len(rows)
+                rows.append([parent, seg, n, n])
+            rows[i][3] = n + 1
+            parent = i
+    return rows, root_count
+
+def write_shards(tracks: Iterable[dict], art_table: dict, out_dir: Path,
+                 data_format: str, compress: bool = False) -> list[dict]:
+    """Write one script per top-level folder under SHARDDIR/; returns the manifest entries.
+
+    tracks must already be in library_order(), which keeps every top-level
+    folder contiguous: shard i holds global track numbers [start, start+count).
+    Each file calls window.__AUDIO_SHARD(i, data) with its tracks and the art
+    they use. File names carry a content hash so a browser never keeps a
+    stale shard cached.
+    """
+    shard_dir = out_dir / SHARDDIR
+    shard_dir.mkdir(exist_ok=True)
+    groups: dict[str, list[dict]] = {}
+    for t in tracks:
+        groups.setdefault(t["folder"].split("/", 1)[0], []).append(t)
+    entries, start = [], 0
+    for i, (top, group) in enumerate(groups.items()):
+        def pieces():
+            data = {"count": len(group), "art": referenced_art(group, art_table),
+                    **track_rows(group, data_format)}
+            return script_pieces(f"window.__AUDIO_SHARD({i},", data, ");")
+        md5 = hashlib.md5()             # name first (one encoding pass), write only if new
+        for piece in pieces():
+            md5.update(piece.encode())
+        name = f"shard-{i:04d}-{md5.hexdigest()[:10]}.js"
+        if not (shard_dir / name).exists() or (compress and not (shard_dir / f"{name}.gz").exists()):
+            write_script(shard_dir / name, pieces(), compress)
+        entries.append({"top": top, "file": f"{SHARDDIR}/{name}", "start": start, "count": len(group)})
+        start += len(group)
+    names = [e["file"].rsplit("/", 1)[1] for e in entries]
+    _sync_dir(shard_dir, {n + suffix for n in names for suffix in ("", *(s for s, _ in COMPRESSED))},
+              _SHARD_NAME_RE)
+    return entries
+
+def _digest(obj) -> str:
+    return hashlib.md5(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:12]
+
+def fingerprint(t: dict) -> str:
+    """Short digest of what the page shows for a track (art by ID); any tag,
+    duration or art change gives the track a new one."""
+    return hashlib.md5("\0".join(map(repr, (t[f] for f in FP_FIELDS))).encode()).hexdigest()[:8]
+
+def art_version(art_table: dict, sprites: list) -> str:
+    """Digest of the art table as the page stores it (IDs → URLs / sprite cells)."""
+    md5 = hashlib.md5(_encode(sprites).encode())
+    for aid in sorted(art_table):
+        md5.update(f"{aid}\0{_encode(art_table[aid])}\0".encode())
+    return md5.hexdigest()[:12]
+
+def content_version(tracks: list[dict], art_ver: str) -> str:
+    """Version of a library state, Merkle style: one hash over the track
+    fingerprints (in library order) combined with the art table's.
+
+    The same tracks and art give the same version; retagging a file or
+    replacing a cover gives a new one.
+    """
+    md5 = hashlib.md5()
+    for t in tracks:
+        md5.update(t["fp"].encode())
+    return hashlib.md5(f"{md5.hexdigest()}:{art_ver}".encode()).hexdigest()[:12]
+
+class DeltaState:
+    """What the base audiodata.js holds (track fingerprints, art digests), plus
+    every path and art id a delta has carried since, kept in DELTASTATE.
+
+    Deltas are cumulative: once a record has been in a delta it stays there
+    until the next compaction. A page whose IndexedDB copy holds the base
+    plus any earlier delta can apply the latest one without going wrong.
+    """
+
+    def __init__(self, path: Path, settings: dict):
+        self.path = path
+        self.settings = settings
+        self.version: str | None = None
+        self.tracks: dict[str, str] = {}
+        self.art: dict[str, str] = {}
+        self.touched: set[str] = set()
+        self.touched_art: set[str] = set()
+
+    def load(self) -> "DeltaState":
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self
+        if data.get("settings") == self.settings:
+            self.version = data["version"]
+            self.tracks, self.art = data["tracks"], data["art"]
+            self.touched, self.touched_art = set(data["touched"]), set(data["touchedArt"])
+        return self
+
+    def rebase(self, version: str, track_digests: dict, art_digests: dict):
+        self.version = version
+        self.tracks, self.art = track_digests, art_digests
+        self.touched, self.touched_art = set(), set()
+
+    def diff(self, track_digests: dict, art_digests: dict) -> tuple[list, list, list, list]:
+        """Return (added, changed, removed paths, art ids) relative to the base,
+        and remember them as touched."""
+        self.touched |= {p for p, d in track_digests.items() if self.tracks.get(p) != d}
+        self.touched |= self.tracks.keys() - track_digests.keys()
+        self.touched_art |= {a for a, d in art_digests.items() if self.art.get(a) != d}
+        added   = sorted(p for p in self.touched if p in track_digests and p not in self.tracks)
+        changed = sorted(p for p in self.touched if p in track_digests and p in self.tracks)
+        removed = sorted(p for p in self.touched if p not in track_digests)
+        return added, changed, removed, sorted(a for a in self.touched_art if a in art_digests)
+
+    def save(self):
+        body = json.dumps({
+            "settings": self.settings, "version": self.version,
+            "tracks": self.tracks, "art": self.art,
+            "touched": sorted(self.touched), "touchedArt": sorted(self.touched_art),
+        }, ensure_ascii=False, separators=(",", ":"))
+        write_atomic(self.path, body)
+
+def delta_order(base_paths: list[str], tracks: list[dict], fresh: list[str]) -> list[list[int]]:
+    """How the page rebuilds the track order from the base and a delta.
+
+    Returns runs [source, start, count]: source 0 copies base tracks
+    start…start+count-1, source 1 copies that slice of the delta's fresh
+    (added + changed) records.
+    """
+    base_pos = {p: i for i, p in enumerate(base_paths)}
+    fresh_pos = {p: i for i, p in enumerate(fresh)}
+    runs: list[list[int]] = []
+    for t in tracks:
+        p = t["path"]
+        src, i = (1, fresh_pos[p]) if p in fresh_pos else (0, base_pos[p])
+        last = runs[-1] if runs else None
+        if last and last[0] == src and last[1] + last[2] == i:
+            last[2] += 1
+        else:
+            runs.append([src, i, 1])
+    return runs
+
+def write_delta(tracks: list[dict], art_table: dict, sprites: list, art_ver: str, out_dir: Path,
+                root: Path, data_format: str, compact_pct: float,
+                compress: bool = False) -> tuple[str, str | None]:
+    """--delta: write DELTAFILE against the existing base when it is small enough.
+
+    Returns (content version, version of the base kept). A base of None means
+    compaction: the caller must write a new base DATAFILE carrying that
+    version, and DELTAFILE has been removed. tracks must be in
+    library_order() and carry their fingerprints; the state keeps the
+    base's paths in that order.
+    """
+    track_digests = {t["path"]: t["fp"] for t in tracks}
+    art_digests = {aid: _digest(v) for aid, v in art_table.items()}
+    version = content_version(tracks, art_ver)
+    state = DeltaState(out_dir / DELTASTATE,
+                       {"format": data_format, "root": str(root), "order": "library", "digest": "fp"})
+    if (out_dir / DATAFILE).exists():
+        state.load()
+    if state.version is not None:
+        added, changed, removed, art_ids = state.diff(track_digests, art_digests)
+        touched = len(added) + len(changed) + len(removed) + len(art_ids)
+        if touched <= len(state.tracks) * compact_pct / 100:
+            by_path = {t["path"]: t for t in tracks}
+            pos = {t["path"]: i for i, t in enumerate(tracks)}
+            added.sort(key=pos.__getitem__)
+            changed.sort(key=pos.__getitem__)
+            tree, root_count = folder_tree(tracks)
+            delta = {
+                "base":    state.version,
+                "version": version,
+                "artVersion": art_ver,
+                "generated": int(time.time()),
+                "count":   len(tracks),
+                "added":   JSONArray(by_path[p] for p in added),
+                "changed": JSONArray(by_path[p] for p in changed),
+                "removed": removed,
+                "art":     {aid: art_table[aid] for aid in art_ids},
+                "order":   delta_order(list(state.tracks), tracks, added + changed),
+                "tree":    tree,
+                "rootCount": root_count,
+            }
+            if sprites:
+                delta["sprites"] = sprites
+            write_script(out_dir / DELTAFILE, script_pieces("window.__AUDIO_DELTA=", delta), compress)
+            state.save()
+            print(f"✓ Wrote {DELTAFILE}: +{len(added)} ~{len(changed)} −{len(removed)} tracks, "
+                  f"{len(art_ids)} art (base v{state.version} kept)")
+            return version, state.version
+        print(f"✓ Delta touches {touched} records, above {compact_pct:g}% of the base — compacting")
+    state.rebase(version, track_digests, art_digests)
+    state.save()
+    remove_script(out_dir / DELTAFILE)
+    return version, None
+
+def write_datafile(tracks: list[dict], art: dict, out_dir: Path, root: Path,
+                   art_mode: str = "inline", art_settings: ArtSettings = ArtSettings(),
+                   data_format: str = "rows", shards: bool = False,
+                   delta: bool = False, delta_compact: float = DELTA_COMPACT,
+                   compress: bool = False) -> str:
+    """Write audiodata.js (or, with delta, possibly only DELTAFILE) and return its version hash.
+
+    Tracks are written in library_order() along with the folder tree's
+    ranges, so the page neither sorts nor filters to show a folder. Each
+    carries its fingerprint(), and the version is content_version() of
+    them, so the page can tell which records in its IndexedDB copy changed.
+    VERSIONFILE is written last, so it never names data that is not on disk yet.
+    Every script is streamed to disk (iter_json), so apart from the track
+    dicts themselves no copy of the payload is held in memory.
+    """
+    tracks = sort_library(tracks)
+    for t in tracks:
+        t["fp"] = fingerprint(t)
+    art_table, sprites = write_art(art, out_dir, art_mode, art_settings)
+    art_ver = art_version(art_table, sprites)
+    if delta:
+        version, base = write_delta(tracks, art_table, sprites, art_ver, out_dir, root,
+                                    data_format, delta_compact, compress)
+        if base is not None:
+            write_search_index(tracks, out_dir, version, compress)
+            write_version(out_dir, {"version": version, "count": len(tracks),
+                                    "base": base, "delta": True})
+            return version
+    else:
+        version = content_version(tracks, art_ver)
+        remove_script(out_dir / DELTAFILE)
+        (out_dir / DELTASTATE).unlink(missing_ok=True)
     payload = {
-        "version":   hashlib.md5(
-            json.dumps([t["path"] for t in tracks]).encode()
-        ).hexdigest()[:12],
+        "version":   version,
+        "artVersion": art_ver,
         "generated": int(time.time()),
         "root":      str(root),
         "count":     len(tracks),
-        "tracks":    tracks,
     }
-    js_body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
-    out = out_dir / DATAFILE
-    out.write_text(f"window.__AUDIO_DATA={js_body};", encoding="utf-8")
-    size_kb = out.stat().st_size / 1024
-    print(f"✓ Wrote {DATAFILE} ({size_kb:.0f} KB)")
-    return payload["version"]
+    payload["tree"], payload["rootCount"] = folder_tree(tracks)
+    if shards:
+        payload["shards"] = write_shards(tracks, art_table, out_dir, data_format, compress)
+        print(f"✓ Wrote {len(payload['shards'])} shards to {SHARDDIR}/")
+    else:
+        payload["art"] = art_table
+        payload.update(track_rows(tracks, data_format))
+    if sprites:
+        payload["sprites"] = sprites
+    size = write_script(out_dir / DATAFILE, script_pieces("window.__AUDIO_DATA=", payload), compress)
+    print(f"✓ Wrote {DATAFILE} ({size / 1024:.0f} KB)")
+    write_search_index(tracks, out_dir, version, compress)
+    write_version(out_dir, {"version": version, "count": len(tracks),
+                            "base": version, "delta": False, "shards": shards})
+    return version
+
+def write_version(out_dir: Path, info: dict):
+    """Write VERSIONFILE: what the page compares against IndexedDB before
+    deciding whether to load DATAFILE (and DELTAFILE) at all."""
+    info = {**info, "generated": int(time.time())}
+    js_body = json.dumps(info, separators=(",", ":"))
+    write_atomic(out_dir / VERSIONFILE, f"window.__AUDIO_VERSION={js_body};")
+
+# ── Search index ──────────────────────────────────────────────────────────────
+_TOKEN_RE = re.compile(r"\w+")
+
+def fold_text(s: str) -> str:
+    """Lowercase and strip accents ("Beyoncé" → "beyonce"); the page folds
+    queries the same way (NFKD, drop combining marks, toLowerCase)."""
+    if s.isascii():
+        return s.lower()
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in s if not unicodedata.category(c).startswith("M")).lower()
+
+def _utf16_key(s: str) -> bytes:
+    # JavaScript compares strings by UTF-16 code unit; sort the same way.
+    return s.encode("utf-16-be", "surrogatepass")
+
+def build_search_index(tracks: list[dict]) -> dict:
+    """Inverted index over SEARCH_FIELDS.
+
+    Postings are ranks in path order (UTF-16 code-unit order), which the page
+    can rebuild whichever way it got its tracks (file, delta, IndexedDB).
+    tokens are sorted so the page finds every token with a given prefix by
+    binary search. Each token's postings are ascending ranks stored as
+    varint-encoded gaps; offsets[i]:offsets[i+1] slices token i out of the
+    base64 blob.
+    """
+    by_path = sorted(tracks, key=lambda t: _utf16_key(t["path"]))
+    index: dict[str, array.array] = {}          # compact postings: 4 bytes a rank, not an int object
+    field_tokens: dict[str, list[str]] = {}    # artist/album/folder values repeat a lot
+    for rank, t in enumerate(by_path):
+        words = set()
+        for field in SEARCH_FIELDS:
+            value = t[field]
+            if not value:
+                continue
+            if field == "title":        # nearly unique: caching would keep every title's tokens
+                words.update(_TOKEN_RE.findall(fold_text(value)))
+                continue
+            toks = field_tokens.get(value)
+            if toks is None:
+                toks = field_tokens[value] = _TOKEN_RE.findall(fold_text(value))
+            words.update(toks)
+        for w in words:
+            postings = index.get(w)
+            if postings is None:
+                postings = index[w] = array.array("I")
+            postings.append(rank)
+    tokens = sorted(index, key=_utf16_key)
+    blob, offsets = bytearray(), [0]
+    for w in tokens:
+        prev = -1
+        for rank in index[w]:
+            gap, prev = rank - prev - 1, rank
+            while gap > 0x7F:           # varint, 7 bits per byte
+                blob.append(gap & 0x7F | 0x80)
+                gap >>= 7
+            blob.append(gap)
+        offsets.append(len(blob))
+    return {"tokens": tokens, "offsets": offsets,
+            "postings": base64.b64encode(bytes(blob)).decode("ascii")}
+
+def write_search_index(tracks: list[dict], out_dir: Path, version: str, compress: bool = False):
+    index = {"version": version, "count": len(tracks), **build_search_index(tracks)}
+    size = write_script(out_dir / SEARCHFILE, script_pieces("window.__AUDIO_SEARCH=", index), compress)
+    print(f"✓ Wrote {SEARCHFILE} ({len(index['tokens'])} tokens, {size / 1024:.0f} KB)")
 
 # ── Write index.html (embedded, no external deps) ────────────────────────────
 HTML_TEMPLATE = r"""<!DOCTYPE html>
@@ -412,7 +1760,8 @@ html,body{height:100%;overflow:hidden;background:var(--bg);color:var(--text);fon
 /* ── Sidebar tree ───────────────────────────────────────────────────────── */
 #tree-header{padding:10px 12px 6px;font-size:10px;color:var(--text3);letter-spacing:.1em;text-transform:uppercase;flex-shrink:0}
 #tree{flex:1;overflow-y:auto;padding-bottom:8px}
-.tn{display:flex;align-items:center;gap:5px;padding:4px 10px 4px;cursor:pointer;border-radius:4px;margin:1px 4px;font-size:12px;color:var(--text2);transition:background .1s}
+#tree-rows{position:relative}
+.tn{position:absolute;top:0;left:0;right:0;height:22px;display:flex;align-items:center;gap:5px;padding:4px 10px 4px;cursor:pointer;border-radius:4px;margin:1px 4px;font-size:12px;color:var(--text2);transition:background .1s}
 .tn:hover{background:var(--hover);color:var(--text)}
 .tn.active{background:var(--sel);color:var(--accent)}
 .tn .arrow{width:12px;text-align:center;color:var(--text3);font-size:9px;flex-shrink:0;transition:transform .15s}
@@ -420,12 +1769,12 @@ html,body{height:100%;overflow:hidden;background:var(--bg);color:var(--text);fon
 .tn .icon{flex-shrink:0;opacity:.6;font-size:11px}
 .tn .label{flex:1;overflow:hidden;text-overflow:ellipsis;white-space:nowrap;font-family:var(--mono);font-size:11px}
 .tn .cnt{font-size:9px;color:var(--text3);flex-shrink:0}
-.tc{padding-left:16px;overflow:hidden}
-.tc.collapsed{display:none}
 
 /* ── Track list ─────────────────────────────────────────────────────────── */
 #tracklist-header{display:grid;grid-template-columns:28px 1fr 160px 100px 50px;gap:0;padding:6px 14px;position:sticky;top:0;background:var(--bg);border-bottom:1px solid var(--border);font-size:10px;color:var(--text3);letter-spacing:.08em;text-transform:uppercase;z-index:5}
-.tr{display:grid;grid-template-columns:28px 1fr 160px 100px 50px;gap:0;padding:5px 14px;cursor:pointer;border-radius:4px;margin:1px 4px;transition:background .08s;align-items:center}
+#tracks-container{position:relative}
+.tr{display:grid;grid-template-columns:28px 1fr 160px 100px 50px;gap:0;padding:5px 14px;cursor:pointer;border-radius:4px;margin:1px 4px;transition:background .08s;align-items:center;
+  position:absolute;top:0;left:0;right:0;height:42px}
 .tr:hover{background:var(--hover)}
 .tr.playing{background:rgba(63,200,122,.07)}
 .tr.playing .t-title{color:var(--playing)}
@@ -443,6 +1792,7 @@ em.hl{color:var(--accent);font-style:normal}
 /* ── Now playing bar ────────────────────────────────────────────────────── */
 #np-art{width:36px;height:36px;border-radius:3px;background:var(--bg3);flex-shrink:0;overflow:hidden;display:flex;align-items:center;justify-content:center}
 #np-art img{width:100%;height:100%;object-fit:cover}
+#np-art .sprite{width:100%;height:100%;background-repeat:no-repeat}
 #np-art .placeholder{font-size:18px;opacity:.3}
 #np-info{flex:1;min-width:0}
 #np-title{font-size:13px;color:var(--text);white-space:nowrap;overflow:hidden;text-overflow:ellipsis}
@@ -505,7 +1855,7 @@ em.hl{color:var(--accent);font-style:normal}
     <!-- Sidebar -->
     <div id="sidebar">
       <div id="tree-header">Library</div>
-      <div id="tree"></div>
+      <div id="tree"><div id="tree-rows"></div></div>
     </div>
     <div id="resizer"></div>
 
@@ -545,28 +1895,40 @@ em.hl{color:var(--accent);font-style:normal}
 
 <audio id="audio" preload="metadata"></audio>
 
-<script src="audiodata.js"></script>
+<script src="audiodata.version.js"></script>
 <script>
 // ═══════════════════════════════════════════════════════════════════════════
 // MUSIC PLAYER — file:// compatible, zero dependencies
 // ═══════════════════════════════════════════════════════════════════════════
 
 const IDB_NAME    = "MusicPlayer";
-const IDB_STORE   = "library";
-const IDB_VER     = 1;
-const IDB_KEY     = "data";
+const IDB_VER     = 2;
+const IDB_META    = "meta";    // "state" → { version, base, artVersion, sprites, folders, order, fps }
+const IDB_TRACKS  = "tracks";  // one record per track, keyed by path
+const IDB_ART     = "art";     // art id → data URI / file URL / sprite cell
+const IDB_STORES  = [IDB_META, IDB_TRACKS, IDB_ART];
+const DATA_SCRIPT  = "audiodata.js";
+const DELTA_SCRIPT = "audiodata.delta.js";
 const USE_IDB_MIN = 300; // tracks threshold
 
 // === State ===
 let ALL_TRACKS    = [];
-let VIEW_TRACKS   = [];   // currently displayed subset
-let QUEUE         = [];   // play queue (indices into ALL_TRACKS)
+let ART           = {};   // art ID → image URL, or [sheet,x,y,w,h] into SPRITES
+let SPRITES       = [];   // [[url, width, height], …] for --art-mode sprites
+let FOLDERS       = { tree: [], rootCount: 0 };   // folder rows with [start, end) track ranges
+let TREE          = {};   // segment → { children, count, start, end }, built from FOLDERS
+// A track's ID is its index in ALL_TRACKS, which arrives in folder order
+// and is never reordered; views and the queue are Uint32Arrays of IDs.
+let VIEW_IDS      = new Uint32Array(0);   // currently displayed subset
+let QUEUE         = new Uint32Array(0);   // play queue
 let QUEUE_POS     = -1;
 let ACTIVE_FOLDER = null; // null = all
 let SHUFFLED      = false;
 let REPEAT        = 0;    // 0=off 1=all 2=one
 let SEARCHING     = false;
 let idbAvailable  = false;
+let MANIFEST      = null; // --shards: manifest from audiodata.js; tracks arrive per shard
+const SHARD_LOADS = [];   // shard index → Promise of its script having run
 
 // === DOM refs ===
 const $ = id => document.getElementById(id);
@@ -574,7 +1936,9 @@ const audio       = $("audio");
 const searchEl    = $("search");
 const statsEl     = $("stats");
 const treeEl      = $("tree");
+const treeRowsEl  = $("tree-rows");
 const tracksEl    = $("tracks-container");
+const listEl      = $("tracklist");
 const loaderEl    = $("loader");
 const emptyEl     = $("empty");
 const headerEl    = $("tracklist-header");
@@ -596,195 +1960,838 @@ const fmt = s => {
 const esc = s => s.replace(/[&<>"']/g, c =>
   ({"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;","'":"&#39;"}[c]));
 
+// Search text is compared accent-folded and lowercased, split into word
+// tokens; the scanner's search index (fold_text) folds the same way.
+const foldText = s => s.normalize("NFKD").replace(/\p{M}/gu, "").toLowerCase();
+const TOKEN_RE = /[\p{L}\p{N}_]+/gu;
+const queryWords = q => foldText(q).match(TOKEN_RE) || [];
+
+// Marks the start of every word in str that begins with a query word.
 function highlight(str, q) {
-  if (!q) return esc(str);
-  const idx = str.toLowerCase().indexOf(q.toLowerCase());
-  if (idx < 0) return esc(str);
-  return esc(str.slice(0,idx)) +
-    `<em class="hl">${esc(str.slice(idx, idx+q.length))}</em>` +
-    esc(str.slice(idx+q.length));
+  const words = q ? queryWords(q) : [];
+  if (!words.length) return esc(str);
+  const chars = [...str];
+  let folded = "";
+  const from = [];   // folded code unit → index into chars
+  chars.forEach((c, i) => {
+    const f = foldText(c);
+    folded += f;
+    for (let k = 0; k < f.length; k++) from.push(i);
+  });
+  const marked = new Uint8Array(chars.length);
+  for (const m of folded.matchAll(TOKEN_RE)) {
+    const w = words.find(w => m[0].startsWith(w));
+    if (w) for (let k = m.index; k < m.index + w.length; k++) marked[from[k]] = 1;
+  }
+  let html = "";
+  for (let i = 0; i < chars.length;) {
+    let j = i;
+    while (j < chars.length && marked[j] === marked[i]) j++;
+    const part = esc(chars.slice(i, j).join(""));
+    html += marked[i] ? `<em class="hl">${part}</em>` : part;
+    i = j;
+  }
+  return html;
 }
 
 // === IndexedDB ===
+// Tracks and art are stored one record each, so a delta (--delta) rewrites
+// only the records it touches instead of the whole library.
 function openIDB() {
   return new Promise((res, rej) => {
     const req = indexedDB.open(IDB_NAME, IDB_VER);
-    req.onupgradeneeded = e => e.target.result.createObjectStore(IDB_STORE);
+    req.onupgradeneeded = e => {
+      const db = e.target.result;
+      for (const name of [...db.objectStoreNames]) db.deleteObjectStore(name);  // v1: one blob
+      db.createObjectStore(IDB_META);
+      db.createObjectStore(IDB_TRACKS, { keyPath: "path" });
+      db.createObjectStore(IDB_ART);
+    };
     req.onsuccess = e => res(e.target.result);
     req.onerror   = () => rej(req.error);
   });
 }
-async function idbGet(db, key) {
+async function idbKeys(db, store) {
   return new Promise((res, rej) => {
-    const tx = db.transaction(IDB_STORE, "readonly");
-    const req = tx.objectStore(IDB_STORE).get(key);
+    const req = db.transaction(store, "readonly").objectStore(store).getAllKeys();
     req.onsuccess = () => res(req.result);
     req.onerror   = () => rej(req.error);
   });
 }
-async function idbSet(db, key, val) {
+async function idbGet(db, store, key) {
   return new Promise((res, rej) => {
-    const tx = db.transaction(IDB_STORE, "readwrite");
-    const req = tx.objectStore(IDB_STORE).put(val, key);
-    req.onsuccess = () => res();
+    const tx = db.transaction(store, "readonly");
+    const req = tx.objectStore(store).get(key);
+    req.onsuccess = () => res(req.result);
     req.onerror   = () => rej(req.error);
   });
 }
+// Everything but the meta record: { tracks: [...], art: { id: value } }.
+async function idbReadAll(db) {
+  return new Promise((res, rej) => {
+    const tx = db.transaction([IDB_TRACKS, IDB_ART], "readonly");
+    const out = { tracks: null, art: {} };
+    tx.objectStore(IDB_TRACKS).getAll().onsuccess = e => { out.tracks = e.target.result; };
+    const art = tx.objectStore(IDB_ART);
+    art.getAllKeys().onsuccess = e => {
+      const keys = e.target.result;
+      art.getAll().onsuccess = e2 => keys.forEach((k, i) => { out.art[k] = e2.target.result[i]; });
+    };
+    tx.oncomplete = () => res(out);
+    tx.onerror = tx.onabort = () => rej(tx.error);
+  });
+}
+// Runs fn(storeByName) inside one readwrite transaction over all stores.
+async function idbWrite(db, fn) {
+  return new Promise((res, rej) => {
+    const tx = db.transaction(IDB_STORES, "readwrite");
+    fn(name => tx.objectStore(name));
+    tx.oncomplete = () => res();
+    tx.onerror = tx.onabort = () => rej(tx.error);
+  });
+}
 async function clearIDB() {
   const db = await openIDB();
-  await new Promise((res, rej) => {
-    const tx = db.transaction(IDB_STORE, "readwrite");
-    const req = tx.objectStore(IDB_STORE).clear();
-    req.onsuccess = res; req.onerror = rej;
+  await idbWrite(db, store => IDB_STORES.forEach(n => store(n).clear()));
+}
+
+// === load data ===
+// === Payload decoding ===
+// Format 1 ships `tracks` as an array of objects. Format 2 (--data-format
+// columns) ships one array per field: high-repetition strings are indices
+// into `strings[field]`, and `folder` indexes `folders`, a list of
+// [parentIndex, segment] pairs. Column tracks decode lazily: each is a thin
+// object whose getters read the columns on first access.
+const STRING_FIELDS = ["artist", "album", "albumArtist", "genre", "year", "art"];
+const PLAIN_FIELDS  = ["title", "track", "disc", "duration", "fp"];
+
+function decodeColumns(raw) {
+  const C = raw.columns, S = raw.strings;
+  const folders = new Array(raw.folders.length);
+  raw.folders.forEach(([parent, seg], i) => {
+    folders[i] = parent < 0 ? seg : (folders[parent] ? `${folders[parent]}/${seg}` : seg);
   });
+  function ColTrack(i) { this.i = i; }
+  const props = {
+    folder: { get() { return folders[C.folder[this.i]]; } },
+    path:   { get() { const f = folders[C.folder[this.i]]; return f ? `${f}/${C.name[this.i]}` : C.name[this.i]; } },
+  };
+  for (const k of PLAIN_FIELDS)  props[k] = { get() { return C[k][this.i]; } };
+  for (const k of STRING_FIELDS) props[k] = { get() { return S[k][C[k][this.i]] || (k === "art" ? null : ""); } };
+  Object.defineProperties(ColTrack.prototype, props);
+  const tracks = new Array(raw.count);
+  for (let i = 0; i < raw.count; i++) tracks[i] = new ColTrack(i);
+  return tracks;
+}
+
+function decodeTracks(p) {
+  return p.columns ? decodeColumns(p) : p.tracks;
+}
+
+function usePayload(p) {
+  ALL_TRACKS = decodeTracks(p);
+  ART = p.art || {};
+  SPRITES = p.sprites || [];
+  FOLDERS = { tree: p.tree, rootCount: p.rootCount };
+}
+
+const TRACK_FIELDS = ["path", "folder", ...PLAIN_FIELDS, ...STRING_FIELDS];
+// Column tracks keep their fields in prototype getters, which IDB would not store.
+function plainTrack(t) {
+  const o = {};
+  for (const k of TRACK_FIELDS) o[k] = t[k];
+  return o;
+}
+
+// === Delta (--delta) ===
+// audiodata.delta.js holds everything that changed since the base
+// audiodata.js: added / changed tracks, removed paths and new art, plus the
+// new folder tree and order. It is cumulative, so it applies equally to the
+// base or to a copy that already took an earlier delta of the same base.
+// d.order lists runs [source, start, count] of base tracks (source 0) or of
+// the delta's added + changed records (source 1), in the new order.
+function useDelta(d) {
+  const fresh = [...d.added, ...d.changed];
+  const out = [];
+  for (const [src, start, count] of d.order) {
+    const from = src ? fresh : ALL_TRACKS;
+    for (let i = start; i < start + count; i++) out.push(from[i]);
+  }
+  ALL_TRACKS = out;
+  Object.assign(ART, d.art);
+  if (d.sprites) SPRITES = d.sprites;
+  FOLDERS = { tree: d.tree, rootCount: d.rootCount };
+}
+
+// IDB hands records back in path order: order[id] is the position of track
+// id among them, and fps lists the tracks' fingerprints in that same order
+// (comma-separated), which is what the next refresh diffs against.
+// Sorting paths here is paid once per stored version.
+function keyOrder() {
+  const paths = ALL_TRACKS.map(t => t.path);
+  const byPath = new Uint32Array(paths.length).map((_, i) => i).sort((a, b) => paths[a] < paths[b] ? -1 : 1);
+  const order = new Uint32Array(paths.length);
+  const fps = new Array(paths.length);
+  byPath.forEach((id, k) => { order[id] = k; fps[k] = ALL_TRACKS[id].fp || ""; });
+  return { order, fps: fps.join(",") };
+}
+
+function storeDelta(store, d, meta) {
+  const tracks = store(IDB_TRACKS), art = store(IDB_ART);
+  for (const t of [...d.added, ...d.changed]) tracks.put(t);
+  for (const p of d.removed) tracks.delete(p);
+  for (const [k, v] of Object.entries(d.art)) art.put(v, k);
+  store(IDB_META).put(meta, "state");
+}
+
+function storeAll(store, meta) {
+  IDB_STORES.forEach(n => store(n).clear());
+  const tracks = store(IDB_TRACKS), art = store(IDB_ART);
+  for (const t of ALL_TRACKS) tracks.put(plainTrack(t));
+  for (const [k, v] of Object.entries(ART)) art.put(v, k);
+  store(IDB_META).put(meta, "state");
+}
+
+// A new version over an older copy: keys are the stored paths (in key
+// order, matching cached.fps). Only tracks whose fingerprint differs are
+// written, gone ones deleted, and the art store is rewritten only when its
+// version moved. Returns { written, removed }, or null after falling back
+// to storeAll when the old copy cannot be diffed.
+function storeChanged(store, keys, cached, meta) {
+  const fps = cached.fps.split(",");
+  if (fps.length !== keys.length) { storeAll(store, meta); return null; }
+  const old = new Map();
+  keys.forEach((p, k) => old.set(p, fps[k]));
+  const tracks = store(IDB_TRACKS);
+  let written = 0;
+  for (const t of ALL_TRACKS) {
+    if (!t.fp || old.get(t.path) !== t.fp) { tracks.put(plainTrack(t)); written++; }
+    old.delete(t.path);
+  }
+  for (const p of old.keys()) tracks.delete(p);
+  if (cached.artVersion !== meta.artVersion) {
+    const art = store(IDB_ART);
+    art.clear();
+    for (const [k, v] of Object.entries(ART)) art.put(v, k);
+  }
+  store(IDB_META).put(meta, "state");
+  return { written, removed: old.size };
+}
+
+// === Shards (--shards) ===
+// audiodata.js is then only a manifest: folder tree, counts and one entry per
+// top-level folder. Each shard is a plain <script> (works over file://) that
+// calls window.__AUDIO_SHARD(i, data); its tracks occupy global slots
+// [start, start+count) of ALL_TRACKS, which stays sparse until loaded.
+function loadScript(src) {
+  return new Promise((res, rej) => {
+    const s = document.createElement("script");
+    s.src = src;
+    s.onload = res;
+    s.onerror = () => rej(new Error(`failed to load ${src}`));
+    document.head.appendChild(s);
+  });
+}
+
+window.__AUDIO_SHARD = (i, data) => {
+  const start = MANIFEST.shards[i].start;
+  const tracks = decodeTracks(data);
+  tracks.forEach((t, k) => { ALL_TRACKS[start + k] = t; });
+  Object.assign(ART, data.art || {});
+  sendTracks(start, start + tracks.length);
+};
+
+function loadShard(i) {
+  if (!SHARD_LOADS[i]) {
+    SHARD_LOADS[i] = loadScript(MANIFEST.shards[i].file).catch(e => {
+      SHARD_LOADS[i] = null;   // allow a retry on the next request
+      throw e;
+    });
+  }
+  return SHARD_LOADS[i];
+}
+
+// Resolve once every track under path (null = whole library) is in ALL_TRACKS.
+function ensureTracks(path) {
+  if (!MANIFEST) return Promise.resolve();
+  const top = path === null ? null : path.split("/")[0];
+  const wanted = MANIFEST.shards
+    .map((sh, i) => (top === null || sh.top === top) ? i : -1)
+    .filter(i => i >= 0);
+  if (wanted.some(i => !SHARD_LOADS[i])) statsEl.textContent = "Loading…";
+  return Promise.all(wanted.map(loadShard));
 }
 
 // === load data ===
+// audiodata.version.js is the only data script in the page. On an IDB
+// version hit the big audiodata.js is never loaded; otherwise it is injected
+// here, followed by audiodata.delta.js when the version file lists one.
+async function loadData(ver) {
+  await loadScript(DATA_SCRIPT);
+  if (ver.delta) await loadScript(DELTA_SCRIPT).catch(() => {});
+  return window.__AUDIO_DATA;
+}
+
+function showMissing() {
+  loaderEl.innerHTML = '<span>⚠ audiodata.js not found or empty.<br>Run scan_music.py in this folder.</span>';
+}
+
 async function boot() {
-  const raw = window.__AUDIO_DATA;
-  if (!raw || !raw.tracks) {
-    loaderEl.innerHTML = '<span>⚠ audiodata.js not found or empty.<br>Run scan_music.py in this folder.</span>';
+  const ver = window.__AUDIO_VERSION;
+  if (!ver) { showMissing(); return; }
+  DATA_VERSION = ver.version;
+
+  const useIDB = !ver.shards && ver.count > USE_IDB_MIN;
+  let db = null, cached = null;
+  if (useIDB) {
+    try {
+      db = await openIDB();
+      idbAvailable = true;
+      cached = await idbGet(db, IDB_META, "state");
+      if (cached && cached.version === ver.version && cached.order) {
+        // Cache hit — use IDB data, audiodata.js is not needed
+        const stored = await idbReadAll(db);
+        ALL_TRACKS = Array.from(cached.order, k => stored.tracks[k]);
+        ART = stored.art;
+        SPRITES = cached.sprites || [];
+        FOLDERS = cached.folders;
+        idbStatus.textContent = `IDB cache hit · v${ver.version} · ${ALL_TRACKS.length} tracks`;
+        init();
+        return;
+      }
+    } catch(e) {
+      // IDB failed (e.g. file:// in some browsers) — fall through
+      db = null;
+    }
+  }
+
+  const raw = await loadData(ver).catch(() => null);
+  if (!raw || !(raw.tracks || raw.columns || raw.shards)) { showMissing(); return; }
+
+  if (raw.shards) {
+    MANIFEST = raw;
+    ALL_TRACKS = new Array(raw.count);
+    SPRITES = raw.sprites || [];
+    FOLDERS = { tree: raw.tree, rootCount: raw.rootCount };
+    idbStatus.textContent = `Sharded library · v${raw.version} · ${raw.shards.length} shards · IDB not used`;
+    init();
     return;
   }
 
-  const useIDB = raw.tracks.length > USE_IDB_MIN;
+  // A delta only applies to the base it was computed against.
+  const delta = window.__AUDIO_DELTA && window.__AUDIO_DELTA.base === raw.version
+    ? window.__AUDIO_DELTA : null;
+  const version = delta ? delta.version : raw.version;
+  const artVersion = delta ? delta.artVersion : raw.artVersion;
+  usePayload(raw);
+  if (delta) useDelta(delta);
 
-  if (useIDB) {
+  if (!useIDB) {
+    idbStatus.textContent = `Direct load (${ALL_TRACKS.length} tracks, IDB not needed)`;
+  } else if (!db) {
+    idbStatus.textContent = "IDB unavailable — using direct load";
+  } else {
+    const meta = { version, base: raw.version, artVersion, sprites: SPRITES, folders: FOLDERS, ...keyOrder() };
     try {
-      const db = await openIDB();
-      idbAvailable = true;
-      const cached = await idbGet(db, IDB_KEY);
-      if (cached && cached.version === raw.version) {
-        // Cache hit — use IDB data
-        ALL_TRACKS = cached.tracks;
-        idbStatus.textContent = `IDB cache hit · v${raw.version} · ${ALL_TRACKS.length} tracks`;
+      if (cached && delta && cached.base === raw.version) {
+        // Same base — write back only the records the delta touches
+        await idbWrite(db, store => storeDelta(store, delta, meta));
+        idbStatus.textContent = `IDB delta applied · v${version} · ` +
+          `+${delta.added.length} ~${delta.changed.length} −${delta.removed.length}`;
+      } else if (cached && cached.fps) {
+        // Older copy — write back only the tracks whose fingerprint changed
+        const keys = await idbKeys(db, IDB_TRACKS);
+        let diff = null;
+        await idbWrite(db, store => { diff = storeChanged(store, keys, cached, meta); });
+        idbStatus.textContent = diff
+          ? `IDB updated · v${version} · ${diff.written} changed, ${diff.removed} removed`
+          : `IDB refreshed · v${version} · ${ALL_TRACKS.length} tracks`;
       } else {
         // Cache miss — persist fresh data
-        ALL_TRACKS = raw.tracks;
-        await idbSet(db, IDB_KEY, { version: raw.version, tracks: raw.tracks });
-        idbStatus.textContent = `IDB refreshed · v${raw.version} · ${ALL_TRACKS.length} tracks`;
+        await idbWrite(db, store => storeAll(store, meta));
+        idbStatus.textContent = `IDB refreshed · v${version} · ${ALL_TRACKS.length} tracks`;
       }
     } catch(e) {
-      // IDB failed (e.g. file:// in some browsers) — fall through
-      ALL_TRACKS = raw.tracks;
-      idbStatus.textContent = "IDB unavailable — using direct load";
+      idbStatus.textContent = "IDB write failed — using direct load";
     }
-  } else {
-    ALL_TRACKS = raw.tracks;
-    idbStatus.textContent = `Direct load (${ALL_TRACKS.length} tracks, IDB not needed)`;
   }
 
   init();
 }
 
 // === Build folder tree ======
-function buildTree(tracks) {
-  const root = {};
-  tracks.forEach((t, i) => {
-    const parts = t.folder ? t.folder.split("/") : [""];
-    let node = root;
-    for (const p of parts) {
-      if (!node[p]) node[p] = { children: {}, indices: [] };
-      node[p].indices.push(i);
-      node = node[p].children;
-    }
-  });
+// The generator writes tracks in folder order, so every folder (subfolders
+// included) is one run of IDs; its rows are [parentIndex, segment, start, end].
+function buildTree({ tree, rootCount }) {
+  const root = {}, nodes = [];
+  for (const [parent, seg, start, end] of tree) {
+    const node = { children: {}, count: end - start, start, end };
+    (parent < 0 ? root : nodes[parent].children)[seg] = node;
+    nodes.push(node);
+  }
+  if (rootCount) root[""] = { children: {}, count: rootCount, start: 0, end: rootCount };
   return root;
 }
 
-function renderTree(node, depth, parentPath) {
-  let html = "";
-  const entries = Object.entries(node).sort(([a],[b]) => a.localeCompare(b));
-  for (const [name, data] of entries) {
-    const path = parentPath ? `${parentPath}/${name}` : name;
-    const hasChildren = Object.keys(data.children).length > 0;
-    const arrow = hasChildren ? "▶" : "·";
-    const cnt   = data.indices.length;
-    const indent = depth * 14;
-    html += `<div class="tn" data-path="${esc(path)}" data-depth="${depth}" style="padding-left:${10+indent}px" title="${esc(path)}">
-      <span class="arrow">${arrow}</span>
-      <span class="icon">${hasChildren ? "📁" : "📂"}</span>
-      <span class="label">${esc(name || "[root]")}</span>
-      <span class="cnt">${cnt}</span>
-    </div>`;
-    if (hasChildren) {
-      html += `<div class="tc collapsed" data-parent="${esc(path)}">${renderTree(data.children, depth+1, path)}</div>`;
-    }
+// [start, end) of the tracks under path; null for the whole library.
+function folderRange(path) {
+  if (path === null) return null;
+  let node = { children: TREE };
+  for (const seg of path.split("/")) {
+    node = node.children[seg];
+    if (!node) return [0, 0];
+  }
+  return [node.start, node.end];
+}
+
+// === Folder tree view ===
+// Only expanded folders contribute rows: TREE_ROWS is the flattened list of
+// visible nodes, rebuilt when a folder opens or closes, and a node's sorted
+// children are made the first time it opens. Rows are virtualized like the
+// track list: pooled .tn elements placed at index × TREE_ROW_H inside
+// #tree-rows. Folder state lives in TREE_NODES, never in the DOM.
+const TREE_ROW_H  = 24;        // px: .tn height 22 + 1px margin top and bottom
+const TREE_INDENT = 30;        // px per level
+const TREE_NODES  = new Map(); // path → { path, name, depth, data, leaf, open, kids }
+const TREE_POOL   = [];        // { el, arrow, icon, label, cnt, pos }
+let TREE_TOP  = [];            // top-level nodes
+let TREE_ROWS = [];            // visible nodes, in display order
+let treePaintQueued = false;
+
+// Sorted child nodes of data (a tree level), registered in TREE_NODES.
+function treeLevel(data, depth, parentPath) {
+  return Object.keys(data).sort((a, b) => a.localeCompare(b)).map(name => {
+    const path = parentPath === null ? name : `${parentPath}/${name}`;
+    let leaf = true;
+    for (const _ in data[name].children) { leaf = false; break; }
+    const n = { path, name, depth, data: data[name], leaf, open: false, kids: null };
+    TREE_NODES.set(path, n);
+    return n;
+  });
+}
+
+function setOpen(n, open) {
+  if (n.leaf) return;
+  if (open && !n.kids) n.kids = treeLevel(n.data.children, n.depth + 1, n.path);
+  n.open = open;
+}
+
+function flattenTree() {
+  const rows = [];
+  const walk = level => { for (const n of level) { rows.push(n); if (n.open) walk(n.kids); } };
+  walk(TREE_TOP);
+  TREE_ROWS = rows;
+  treeRowsEl.style.height = `${rows.length * TREE_ROW_H}px`;
+  paintTree(true);
+}
+
+function makeTreeRow() {
+  const el = document.createElement("div");
+  el.className = "tn";
+  const span = cls => { const s = document.createElement("span"); s.className = cls; el.appendChild(s); return s; };
+  const row = { el, arrow: span("arrow"), icon: span("icon"), label: span("label"), cnt: span("cnt"), pos: -1 };
+  treeRowsEl.appendChild(el);
+  return row;
+}
+
+function fillTreeRow(r, pos) {
+  const n = TREE_ROWS[pos];
+  r.pos = pos;
+  r.el.dataset.path = n.path;
+  r.el.title = n.path;
+  r.el.style.display = "";
+  r.el.style.transform = `translateY(${pos * TREE_ROW_H}px)`;
+  r.el.style.paddingLeft = `${10 + n.depth * TREE_INDENT}px`;
+  r.el.classList.toggle("open", n.open);
+  r.el.classList.toggle("active", n.path === ACTIVE_FOLDER);
+  r.arrow.textContent = n.leaf ? "·" : "▶";
+  r.icon.textContent = n.leaf ? "📂" : "📁";
+  r.label.textContent = n.name || "[root]";
+  r.cnt.textContent = n.data.count;
+}
+
+// refill: TREE_ROWS changed, so no pooled row can be kept as is.
+function paintTree(refill) {
+  const n = TREE_ROWS.length;
+  const top = treeEl.scrollTop;
+  const first = Math.max(0, Math.floor(top / TREE_ROW_H) - OVERSCAN);
+  const last  = Math.min(n, Math.ceil((top + treeEl.clientHeight) / TREE_ROW_H) + OVERSCAN);
+  while (TREE_POOL.length < last - first) TREE_POOL.push(makeTreeRow());
+  const kept = new Set(), free = [];
+  for (const r of TREE_POOL) {
+    if (!refill && r.pos >= first && r.pos < last) kept.add(r.pos); else free.push(r);
+  }
+  for (let pos = first; pos < last; pos++) if (!kept.has(pos)) fillTreeRow(free.pop(), pos);
+  for (const r of free) { r.pos = -1; r.el.style.display = "none"; }
+}
+
+function scheduleTreePaint() {
+  if (treePaintQueued) return;
+  treePaintQueued = true;
+  requestAnimationFrame(() => { treePaintQueued = false; paintTree(false); });
+}
+treeEl.addEventListener("scroll", scheduleTreePaint);
+window.addEventListener("resize", scheduleTreePaint);
+
+// Re-marks the active folder on the rows in the pool.
+function markActiveFolder() {
+  for (const r of TREE_POOL) {
+    if (r.pos >= 0) r.el.classList.toggle("active", TREE_ROWS[r.pos].path === ACTIVE_FOLDER);
   }
-  return html;
 }
 
 // ==== track list ======
-function renderTracks(tracks, query) {
-  if (!tracks.length) {
-    tracksEl.innerHTML = "";
+// === Virtual track list ===
+// Only the rows in view (plus OVERSCAN above and below) exist in the DOM.
+// Every row is ROW_H tall and absolutely placed at index × ROW_H inside
+// #tracks-container, which is sized to the whole list. Row elements are
+// pooled; scrolling refills only the rows whose position left the window.
+const ROW_H    = 44;   // px: .tr height 42 + 1px margin top and bottom
+const OVERSCAN = 8;
+const ROW_POOL = [];   // { el, pos, idx, num, title, sub, artist, album, dur }
+let VLIST = { ids: new Uint32Array(0), q: "" };
+let VIEW_POS = null;   // lazily built inverse of VLIST.ids: ID → row, -1 if not shown
+let paintQueued = false;
+
+function makeRow() {
+  const cell = (parent, cls) => {
+    const c = document.createElement("div");
+    c.className = cls;
+    parent.appendChild(c);
+    return c;
+  };
+  const el = document.createElement("div");
+  el.className = "tr";
+  const num = cell(el, "t-num"), info = cell(el, "t-info");
+  const row = { el, pos: -1, idx: -1, num, title: cell(info, "t-title"), sub: cell(info, "t-sub"),
+                artist: cell(el, "t-artist"), album: cell(el, "t-album"), dur: cell(el, "t-dur") };
+  tracksEl.appendChild(el);
+  return row;
+}
+
+function fillRow(r, pos) {
+  const id = VLIST.ids[pos], t = ALL_TRACKS[id], q = VLIST.q;
+  r.pos = pos;
+  r.idx = id;
+  r.el.dataset.idx = id;
+  r.el.dataset.pos = pos;
+  r.el.style.display = "";
+  r.el.style.transform = `translateY(${pos * ROW_H}px)`;
+  r.el.classList.toggle("playing", QUEUE[QUEUE_POS] === r.idx);
+  r.num.textContent = t.track ? t.track : "·";
+  r.title.innerHTML = highlight(t.title||t.path, q);
+  r.sub.innerHTML = t.artist ? highlight(t.artist, q) : "";
+  r.sub.style.display = t.artist ? "" : "none";
+  r.artist.innerHTML = highlight(t.artist||"", q);
+  r.album.innerHTML = highlight(t.album||"", q);
+  r.dur.textContent = fmt(t.duration);
+}
+
+// refill: the list itself changed, so no pooled row can be kept as is.
+function paintRows(refill) {
+  const n = VLIST.ids.length;
+  const top = Math.max(0, listEl.scrollTop - tracksEl.offsetTop);
+  const first = Math.max(0, Math.floor(top / ROW_H) - OVERSCAN);
+  const last  = Math.min(n, Math.ceil((top + listEl.clientHeight) / ROW_H) + OVERSCAN);
+  while (ROW_POOL.length < last - first) ROW_POOL.push(makeRow());
+  const kept = new Set(), free = [];
+  for (const r of ROW_POOL) {
+    if (!refill && r.pos >= first && r.pos < last) kept.add(r.pos); else free.push(r);
+  }
+  for (let pos = first; pos < last; pos++) if (!kept.has(pos)) fillRow(free.pop(), pos);
+  for (const r of free) { r.pos = r.idx = -1; r.el.style.display = "none"; }
+}
+
+function schedulePaint() {
+  if (paintQueued) return;
+  paintQueued = true;
+  requestAnimationFrame(() => { paintQueued = false; paintRows(false); });
+}
+listEl.addEventListener("scroll", schedulePaint);
+window.addEventListener("resize", schedulePaint);
+
+function viewPos(id) {
+  if (!VIEW_POS) {
+    VIEW_POS = new Int32Array(ALL_TRACKS.length).fill(-1);
+    VLIST.ids.forEach((id, pos) => { VIEW_POS[id] = pos; });
+  }
+  return VIEW_POS[id];
+}
+
+function renderTracks(ids, query) {
+  VLIST = { ids, q: query || "" };
+  VIEW_POS = null;
+  tracksEl.style.height = `${ids.length * ROW_H}px`;
+  if (!ids.length) {
+    paintRows(true);
+    emptyEl.textContent = "No tracks match your search.";
     emptyEl.style.display = "flex";
     headerEl.style.display = "none";
     return;
   }
   emptyEl.style.display = "none";
   headerEl.style.display = "grid";
-  const q = query || "";
-  const rows = tracks.map(t => {
-    const globalIdx = ALL_TRACKS.indexOf(t);
-    const isPlaying = QUEUE[QUEUE_POS] === globalIdx;
-    const num = t.track ? t.track : "·";
-    return `<div class="tr${isPlaying?" playing":""}" data-idx="${globalIdx}">
-      <div class="t-num">${num}</div>
-      <div class="t-info">
-        <div class="t-title">${highlight(t.title||t.path,q)}</div>
-        ${t.artist?`<div class="t-sub">${highlight(t.artist,q)}</div>`:""}
-      </div>
-      <div class="t-artist">${highlight(t.artist||"",q)}</div>
-      <div class="t-album">${highlight(t.album||"",q)}</div>
-      <div class="t-dur">${fmt(t.duration)}</div>
-    </div>`;
-  }).join("");
-  tracksEl.innerHTML = rows;
-  statsEl.textContent = `${tracks.length} tracks`;
+  paintRows(true);
+  statsEl.textContent = `${ids.length} tracks`;
 }
 
 //====== Search =====
+// audiodata.search.js (loaded on the first search) lists every folded token
+// in code-unit order with its postings: ranks of tracks in path order,
+// varint gap-encoded in one base64 blob. A query matches a track when each
+// of its words is a prefix of one of the track's tokens.
+//
+// Searching, folder filtering and queue shuffling run in a worker started
+// from searchWorker's source through a Blob URL (works from file://). The
+// page hands it path and search text of each track as they load and gets
+// views (a folder's ID range, optionally searched) back as transferred
+// Uint32Arrays of IDs. Without Worker support the same
+// function runs on the page, behind the same message interface.
+function searchWorker(self) {
+  const foldText = s => s.normalize("NFKD").replace(/\p{M}/gu, "").toLowerCase();
+  const TOKEN_RE = /[\p{L}\p{N}_]+/gu;
+  let COUNT = 0, LOADED = 0;
+  const PATH = [], RAW = [], TEXT = [];   // by ID; RAW is folded into TEXT on first scan
+  let INDEX = null;
+  let latestView = 0;
+
+  // IDs in [start, end) (a folder), or of every loaded track for null.
+  function rangeIds(range) {
+    if (range) return new Uint32Array(range[1] - range[0]).map((_, i) => range[0] + i);
+    if (LOADED === COUNT) return new Uint32Array(COUNT).map((_, i) => i);
+    const out = [];
+    for (let id = 0; id < COUNT; id++) if (PATH[id] !== undefined) out.push(id);
+    return Uint32Array.from(out);
+  }
+
+  // The part of ascending ids inside [start, end).
+  function within(ids, [start, end]) {
+    const bound = v => { let lo = 0, hi = ids.length; while (lo < hi) { const mid = (lo + hi) >> 1; if (ids[mid] < v) lo = mid + 1; else hi = mid; } return lo; };
+    return ids.subarray(bound(start), bound(end));
+  }
+
+  // Rank r (path order) → track ID, built on first use.
+  function rankIds() {
+    if (!INDEX.rankIds) {
+      const ids = new Uint32Array(COUNT).map((_, i) => i);
+      INDEX.rankIds = ids.sort((a, b) => PATH[a] < PATH[b] ? -1 : PATH[a] > PATH[b] ? 1 : 0);
+    }
+    return INDEX.rankIds;
+  }
+
+  function tokenPostings(i) {
+    const { bytes, offsets } = INDEX;
+    const out = [];
+    let v = 0, shift = 0, rank = -1;
+    for (let p = offsets[i]; p < offsets[i+1]; p++) {
+      const b = bytes[p];
+      v += (b & 0x7F) * 2 ** shift;
+      if (b & 0x80) { shift += 7; continue; }
+      rank += v + 1;
+      out.push(rank);
+      v = 0; shift = 0;
+    }
+    return out;
+  }
+
+  // Ascending ranks of every track with a token starting with word.
+  function prefixRanks(word) {
+    const T = INDEX.tokens;
+    let lo = 0, hi = T.length;
+    while (lo < hi) { const mid = (lo + hi) >> 1; if (T[mid] < word) lo = mid + 1; else hi = mid; }
+    const lists = [];
+    for (let i = lo; i < T.length && T[i].startsWith(word); i++) lists.push(tokenPostings(i));
+    if (lists.length === 1) return Uint32Array.from(lists[0]);
+    const seen = new Uint8Array(COUNT);
+    for (const l of lists) for (const r of l) seen[r] = 1;
+    const out = [];
+    seen.forEach((s, r) => { if (s) out.push(r); });
+    return Uint32Array.from(out);
+  }
+
+  function intersect(a, b) {
+    const out = new Uint32Array(Math.min(a.length, b.length));
+    let i = 0, j = 0, n = 0;
+    while (i < a.length && j < b.length) {
+      if (a[i] < b[j]) i++;
+      else if (a[i] > b[j]) j++;
+      else { out[n++] = a[i]; i++; j++; }
+    }
+    return out.subarray(0, n);
+  }
+
+  // IDs matching every word, ascending (= display order).
+  function indexSearch(words) {
+    const lists = words.map(prefixRanks).sort((a, b) => a.length - b.length);
+    const ranks = lists.reduce(intersect);
+    const map = rankIds();
+    return ranks.map(r => map[r]).sort();
+  }
+
+  // Without an index: the same token-prefix test, one track at a time.
+  function scanSearch(words, pool) {
+    return pool.filter(id => {
+      let text = TEXT[id];
+      if (text === undefined) {
+        text = TEXT[id] = " " + (foldText(RAW[id]).match(TOKEN_RE) || []).join(" ");
+        RAW[id] = undefined;
+      }
+      return words.every(w => text.includes(" " + w));
+    });
+  }
+
+  const ops = {
+    // { start, count, path, text }: tracks start… of a count-track library
+    tracks(m) {
+      COUNT = m.count;
+      m.path.forEach((p, k) => {
+        const id = m.start + k;
+        PATH[id] = p; RAW[id] = m.text[k]; TEXT[id] = undefined;
+      });
+      LOADED += m.path.length;
+      if (INDEX) INDEX.rankIds = null;
+    },
+    // the audiodata.search.js payload
+    index(m) {
+      const bin = atob(m.postings), bytes = new Uint8Array(bin.length);
+      for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+      INDEX = { tokens: m.tokens, offsets: m.offsets, bytes, rankIds: null };
+    },
+    // { range, words } → { ids }, or { ids: null } once a newer view was asked for
+    view(m) {
+      if (m.id !== latestView) return { ids: null };
+      if (!m.words.length) return { ids: rangeIds(m.range) };
+      // Postings cover the whole library; a partly loaded (sharded) one is scanned.
+      if (!INDEX || LOADED < COUNT) return { ids: scanSearch(m.words, rangeIds(m.range)) };
+      const ids = indexSearch(m.words);
+      return { ids: m.range ? within(ids, m.range) : ids };
+    },
+    // { ids, keep } → ids[keep] first, the rest Fisher-Yates shuffled in place
+    shuffle(m) {
+      const q = m.ids, k = m.keep;
+      [q[0], q[k]] = [q[k], q[0]];
+      for (let i = q.length-1; i > 1; i--) {
+        const j = 1 + Math.floor(Math.random()*i);
+        [q[i], q[j]] = [q[j], q[i]];
+      }
+      return { ids: q };
+    },
+  };
+
+  function run(m) {
+    const r = ops[m.op](m);
+    if (m.id) self.postMessage({ id: m.id, ...r }, r.ids ? [r.ids.buffer] : []);
+  }
+  self.onmessage = e => {
+    const m = e.data;
+    if (m.op !== "view") { run(m); return; }
+    // Views wait a turn so that one superseded by a queued newer request is skipped.
+    latestView = m.id;
+    setTimeout(() => run(m), 0);
+  };
+}
+
+let worker = null;
+let workerId = 0;
+const workerCalls = new Map();   // request id → resolve
+
+function startWorker() {
+  const onmessage = e => {
+    const resolve = workerCalls.get(e.data.id);
+    workerCalls.delete(e.data.id);
+    resolve(e.data);
+  };
+  try {
+    const url = URL.createObjectURL(new Blob([`(${searchWorker})(self);`], { type: "text/javascript" }));
+    worker = new Worker(url);
+    worker.onmessage = onmessage;
+  } catch(e) {
+    // No workers here: same code and messages, on this thread
+    const inner = { postMessage: m => setTimeout(() => onmessage({ data: m }), 0) };
+    searchWorker(inner);
+    worker = { postMessage: m => setTimeout(() => inner.onmessage({ data: m }), 0) };
+  }
+}
+
+function workerCall(msg, transfer) {
+  msg.id = ++workerId;
+  return new Promise(resolve => {
+    workerCalls.set(msg.id, resolve);
+    worker.postMessage(msg, transfer || []);
+  });
+}
+
+// Hands tracks [start, end) of ALL_TRACKS to the worker.
+function sendTracks(start, end) {
+  const path = [], text = [];
+  for (let id = start; id < end; id++) {
+    const t = ALL_TRACKS[id];
+    path.push(t.path);
+    text.push([t.title, t.artist, t.album, t.folder].join(" "));
+  }
+  worker.postMessage({ op: "tracks", start, count: ALL_TRACKS.length, path, text });
+}
+
+const SEARCH_SCRIPT = "audiodata.search.js";
+let DATA_VERSION = null;      // version of the loaded library, set in boot()
+let searchIndexLoad = null;   // Promise → whether the worker got an index
+
+function loadSearchIndex() {
+  if (!searchIndexLoad) searchIndexLoad = loadScript(SEARCH_SCRIPT).then(() => {
+    const raw = window.__AUDIO_SEARCH;
+    window.__AUDIO_SEARCH = null;
+    if (!raw || raw.version !== DATA_VERSION || raw.count !== ALL_TRACKS.length) return false;
+    worker.postMessage({ op: "index", tokens: raw.tokens, offsets: raw.offsets, postings: raw.postings });
+    return true;
+  }).catch(() => false);
+  return searchIndexLoad;
+}
+
+// IDs under folder (null = all loaded) matching every word, in ID order;
+// null when a later view request superseded this one.
+async function viewIds(folder, words) {
+  return (await workerCall({ op: "view", range: folderRange(folder), words })).ids;
+}
+
 let searchTimer = null;
-function doSearch(q) {
+let searchSeq   = 0;      // bumps per view change so a late reply cannot render stale results
+async function doSearch(q) {
   q = q.trim().toLowerCase();
   SEARCHING = !!q;
-  if (!q) {
-    VIEW_TRACKS = ACTIVE_FOLDER
-      ? ALL_TRACKS.filter(t => t.folder === ACTIVE_FOLDER || t.folder.startsWith(ACTIVE_FOLDER+"/"))
-      : ALL_TRACKS;
-  } else {
-    const pool = ACTIVE_FOLDER
-      ? ALL_TRACKS.filter(t => t.folder === ACTIVE_FOLDER || t.folder.startsWith(ACTIVE_FOLDER+"/"))
-      : ALL_TRACKS;
-    VIEW_TRACKS = pool.filter(t =>
-      (t.title  ||"").toLowerCase().includes(q) ||
-      (t.artist ||"").toLowerCase().includes(q) ||
-      (t.album  ||"").toLowerCase().includes(q) ||
-      (t.folder ||"").toLowerCase().includes(q)
-    );
-  }
-  renderTracks(VIEW_TRACKS, q);
+  const seq = ++searchSeq;
+  if (MANIFEST && !q && ACTIVE_FOLDER === null) { showPickFolder(); return; }
+  await ensureTracks(ACTIVE_FOLDER);
+  const words = queryWords(q);
+  if (words.length) await loadSearchIndex();
+  if (seq !== searchSeq) return;
+  const ids = await viewIds(ACTIVE_FOLDER, words);
+  if (!ids || seq !== searchSeq) return;
+  VIEW_IDS = ids;
+  renderTracks(VIEW_IDS, q);
 }
 
 //////////  Playback //////////////
-function buildQueue(startIdx) {
-  // Queue = all VIEW_TRACKS in order, start from clicked track
-  QUEUE = VIEW_TRACKS.map(t => ALL_TRACKS.indexOf(t));
-  const pos = QUEUE.indexOf(startIdx);
-  QUEUE_POS = pos >= 0 ? pos : 0;
-  if (SHUFFLED) shuffleQueue(pos >= 0 ? pos : 0);
+let queueSeq = 0;
+
+// Makes ids (handed over, not copied) the play queue, starting at pos. The
+// worker shuffles; until its queue arrives this one holds just ids[pos].
+function setQueue(ids, pos, shuffle) {
+  const seq = ++queueSeq;
+  if (!shuffle || ids.length < 2) {
+    QUEUE = ids; QUEUE_POS = pos;
+    return Promise.resolve();
+  }
+  QUEUE = Uint32Array.of(ids[pos]); QUEUE_POS = 0;
+  return workerCall({ op: "shuffle", ids, keep: pos }, [ids.buffer]).then(r => {
+    if (seq === queueSeq) { QUEUE = r.ids; QUEUE_POS = 0; }
+  });
 }
 
-function shuffleQueue(keepFirst) {
-  const first = QUEUE[keepFirst !== undefined ? keepFirst : QUEUE_POS];
-  QUEUE = QUEUE.filter((_,i) => i !== (keepFirst !== undefined ? keepFirst : QUEUE_POS));
-  for (let i = QUEUE.length-1; i > 0; i--) {
-    const j = Math.floor(Math.random()*(i+1));
-    [QUEUE[i],QUEUE[j]] = [QUEUE[j],QUEUE[i]];
-  }
-  QUEUE.unshift(first);
-  QUEUE_POS = 0;
+function buildQueue(startPos) {
+  // Queue = all VIEW_IDS in order (a copy: shuffling must not reorder the
+  // view), start from the clicked row
+  const pos = startPos >= 0 && startPos < VIEW_IDS.length ? startPos : 0;
+  return setQueue(VIEW_IDS.slice(), pos, SHUFFLED);
 }
 
 function playTrack(globalIdx) {
@@ -799,26 +2806,40 @@ function playTrack(globalIdx) {
   try { sessionStorage.setItem("lastTrack", globalIdx); } catch(_){}
 }
 
+// Art cell for the now-playing box: a URL (inline data URI or thumbs/ file)
+// becomes an <img>; a sprite reference is cropped out of its sheet, scaled to
+// cover the box the same way object-fit:cover does for <img>.
+function artHTML(ref, box) {
+  const a = ref && ART[ref];
+  if (!a) return `<span class="placeholder">♪</span>`;
+  if (typeof a === "string") return `<img src="${esc(a)}" alt="">`;
+  const [sheet, x, y, w, h] = a;
+  const [url, sw, sh] = SPRITES[sheet];
+  const k = box / Math.min(w, h);
+  const ox = x*k + (w*k - box)/2, oy = y*k + (h*k - box)/2;
+  return `<div class="sprite" style="background-image:url('${esc(url)}');` +
+    `background-size:${sw*k}px ${sh*k}px;background-position:-${ox}px -${oy}px"></div>`;
+}
+
 function updateNowBar(t) {
   npTitle.textContent  = t.title  || t.path;
   npArtist.textContent = [t.artist, t.album].filter(Boolean).join(" — ");
   npTitle.style.color  = "";
-  if (t.art) {
-    npArt.innerHTML = `<img src="${t.art}" alt="">`;
-  } else {
-    npArt.innerHTML = `<span class="placeholder">♪</span>`;
-  }
+  npArt.innerHTML = artHTML(t.art, npArt.clientWidth || 36);
   document.title = (t.title||t.path) + " — Music";
 }
 
 function highlightPlaying(globalIdx) {
-  document.querySelectorAll(".tr").forEach(el => {
-    const idx = parseInt(el.dataset.idx);
-    el.classList.toggle("playing", idx === globalIdx);
-  });
-  // scroll into view
-  const el = document.querySelector(`.tr[data-idx="${globalIdx}"]`);
-  if (el) el.scrollIntoView({ block:"nearest", behavior:"smooth" });
+  for (const r of ROW_POOL) r.el.classList.toggle("playing", r.pos >= 0 && r.idx === globalIdx);
+  // scroll into view (the row may not exist yet: scroll to where it will be
+  // drawn, keeping it clear of the sticky header)
+  const pos = viewPos(globalIdx);
+  if (pos < 0) return;
+  const y = tracksEl.offsetTop + pos * ROW_H;
+  const viewTop = listEl.scrollTop + headerEl.offsetHeight;
+  const viewBottom = listEl.scrollTop + listEl.clientHeight;
+  if (y < viewTop) listEl.scrollTo({ top: y - headerEl.offsetHeight, behavior: "smooth" });
+  else if (y + ROW_H > viewBottom) listEl.scrollTo({ top: y + ROW_H - listEl.clientHeight, behavior: "smooth" });
 }
 
 function playNext() {
@@ -853,17 +2874,20 @@ $("btn-repeat").addEventListener("click", () => {
 $("btn-shuffle").addEventListener("click", () => {
   SHUFFLED = !SHUFFLED;
   $("btn-shuffle").classList.toggle("active", SHUFFLED);
-  if (SHUFFLED && QUEUE.length) shuffleQueue();
+  if (SHUFFLED && QUEUE.length) setQueue(QUEUE, QUEUE_POS, true);
 });
-$("btn-shuffle-all").addEventListener("click", () => {
+$("btn-shuffle-all").addEventListener("click", async () => {
   ACTIVE_FOLDER = null;
-  VIEW_TRACKS = [...ALL_TRACKS];
-  buildQueue(0);
+  const seq = ++searchSeq;
+  await ensureTracks(null);
+  const ids = await viewIds(null, []);
+  if (!ids || seq !== searchSeq) return;
+  VIEW_IDS = ids;
   SHUFFLED = true;
-  shuffleQueue();
   $("btn-shuffle").classList.add("active");
+  await buildQueue(0);
   playTrack(QUEUE[0]);
-  renderTracks(VIEW_TRACKS, "");
+  renderTracks(VIEW_IDS, "");
   $("settingspop").classList.remove("open");
 });
 
@@ -899,47 +2923,50 @@ document.addEventListener("keydown", e => {
 });
 
 // ── Tree interactions ─────────────────────────────────────────────────────
-treeEl.addEventListener("click", e => {
+treeEl.addEventListener("click", async e => {
   const tn = e.target.closest(".tn");
   if (!tn) return;
-  const path = tn.dataset.path;
-
-  // Toggle expand/collapse
-  const childContainer = treeEl.querySelector(`.tc[data-parent="${CSS.escape(path)}"]`);
-  if (childContainer) {
-    const collapsed = childContainer.classList.toggle("collapsed");
-    tn.classList.toggle("open", !collapsed);
-  }
+  const node = TREE_NODES.get(tn.dataset.path);
+  const path = node.path;
 
-  // Select folder
-  document.querySelectorAll(".tn").forEach(n => n.classList.remove("active"));
-  tn.classList.add("active");
+  // Select the folder and open or close it
   ACTIVE_FOLDER = path;
+  if (!node.leaf) {
+    setOpen(node, !node.open);
+    flattenTree();
+  } else {
+    markActiveFolder();
+  }
 
-  VIEW_TRACKS = ALL_TRACKS.filter(t =>
-    t.folder === path || t.folder.startsWith(path+"/")
-  );
-  renderTracks(VIEW_TRACKS, searchEl.value.trim());
-  statsEl.textContent = `${VIEW_TRACKS.length} tracks`;
+  const seq = ++searchSeq;
+  await ensureTracks(path);
+  const ids = await viewIds(path, []);
+  if (!ids || seq !== searchSeq) return;
+  VIEW_IDS = ids;
+  renderTracks(VIEW_IDS, searchEl.value.trim());
+  statsEl.textContent = `${VIEW_IDS.length} tracks`;
 });
 
 // Show all on logo click
 $("logo").style.cursor = "pointer";
-$("logo").addEventListener("click", () => {
-  document.querySelectorAll(".tn").forEach(n => n.classList.remove("active"));
+$("logo").addEventListener("click", async () => {
   ACTIVE_FOLDER = null;
-  VIEW_TRACKS = ALL_TRACKS;
-  renderTracks(ALL_TRACKS, "");
-  statsEl.textContent = `${ALL_TRACKS.length} tracks`;
+  markActiveFolder();
+  const seq = ++searchSeq;
+  await ensureTracks(null);
+  const ids = await viewIds(null, []);
+  if (!ids || seq !== searchSeq) return;
+  VIEW_IDS = ids;
+  renderTracks(VIEW_IDS, "");
+  statsEl.textContent = `${VIEW_IDS.length} tracks`;
 });
 
 // ── Track click → play ────────────────────────────────────────────────────
 tracksEl.addEventListener("click", e => {
   const tr = e.target.closest(".tr");
   if (!tr) return;
-  const idx = parseInt(tr.dataset.idx);
-  buildQueue(idx);
-  playTrack(idx);
+  buildQueue(parseInt(tr.dataset.pos));
+  playTrack(parseInt(tr.dataset.idx));
 });
 
 // ── Search ────────────────────────────────────────────────────────────────
@@ -985,36 +3012,35 @@ $("btn-reload").addEventListener("click", () => location.reload(true));
 })();
 
 // ── Init ──────────────────────────────────────────────────────────────────
+// Sharded libraries start with an empty track list rather than loading every shard.
+function showPickFolder() {
+  VIEW_IDS = new Uint32Array(0);
+  renderTracks(VIEW_IDS, "");
+  emptyEl.textContent = "Pick a folder or search to load tracks.";
+  emptyEl.style.display = "flex";
+  statsEl.textContent = `${MANIFEST.count} tracks`;
+}
+
 function init() {
   loaderEl.style.display = "none";
 
-  // Sort tracks: folder → disc → track → title
-  ALL_TRACKS.sort((a,b) => {
-    const fc = (a.folder||"").localeCompare(b.folder||"");
-    if (fc) return fc;
-    if (a.disc !== b.disc) return (a.disc||0)-(b.disc||0);
-    if (a.track !== b.track) return (a.track||0)-(b.track||0);
-    return (a.title||"").localeCompare(b.title||"");
-  });
-
-  VIEW_TRACKS = [...ALL_TRACKS];
+  // Tracks arrive sorted folder → disc → track → title; no re-sort here.
+  VIEW_IDS = new Uint32Array(MANIFEST ? 0 : ALL_TRACKS.length).map((_, i) => i);
   statsEl.textContent = `${ALL_TRACKS.length} tracks`;
 
   // Build & render tree
-  const TREE_DATA = buildTree(ALL_TRACKS);
-  treeEl.innerHTML = renderTree(TREE_DATA, 0, "");
+  TREE = buildTree(FOLDERS);
+  TREE_TOP = treeLevel(TREE, 0, null);
 
   // Auto-expand root if few top-level folders
-  const roots = treeEl.querySelectorAll(".tn[data-depth='0']");
-  if (roots.length <= 5) {
-    roots.forEach(tn => {
-      const path = tn.dataset.path;
-      const cc = treeEl.querySelector(`.tc[data-parent="${CSS.escape(path)}"]`);
-      if (cc) { cc.classList.remove("collapsed"); tn.classList.add("open"); }
-    });
-  }
+  if (TREE_TOP.length <= 5) TREE_TOP.forEach(n => setOpen(n, true));
+  flattenTree();
 
-  renderTracks(ALL_TRACKS, "");
+  if (MANIFEST) showPickFolder(); else renderTracks(VIEW_IDS, "");
+
+  // After the first paint: the worker gets its copy of the library
+  startWorker();
+  sendTracks(0, MANIFEST ? 0 : ALL_TRACKS.length);
 
   // Restore last track highlight (not auto-play, user must click)
   try {
@@ -1037,7 +3063,473 @@ def write_html(out_dir: Path):
     out.write_text(HTML_TEMPLATE.lstrip(), encoding="utf-8")
     print(f"✓ Wrote {HTMLFILE}")
 
+# ── Serve ─────────────────────────────────────────────────────────────────────
+SERVE_TYPES = {".js": "text/javascript", ".flac": "audio/flac", ".opus": "audio/ogg",
+               ".m4a": "audio/mp4", ".aac": "audio/aac", ".webm": "audio/webm",
+               ".webp": "image/webp", ".avif": "image/avif"}
+_VERSION_RE = re.compile(rb'"version":"(\w+)"')
+
+class PlayerHandler(http.server.BaseHTTPRequestHandler):
+    """GET/HEAD for the player: index.html and the data scripts from the
+    output folder, audio files from the music root. Nothing else is served.
+
+    Audio honours single byte ranges (seeking); data scripts are answered
+    with a COMPRESSED variant the client accepts, if one is current. ETags
+    of data scripts are their payload version, so a client that already
+    holds this scan gets a 304 however often the files are rewritten.
+    """
+    protocol_version = "HTTP/1.1"
+    out_dir: Path
+    root: Path
+    verbose = False
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def resolve(self) -> tuple[Path | None, bool]:
+        """(file for the request path, whether it is a data script)."""
+        rel = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip("/") or HTMLFILE
+        parts = rel.split("/")
+        if "\0" in rel or any(not p or p.startswith(".") for p in parts):
+            return None, False
+        ext = os.path.splitext(rel)[1].lower()
+        if len(parts) == 1 and (rel == HTMLFILE or ext == ".js"):
+            script = rel != HTMLFILE
+        elif len(parts) == 2 and parts[0] in (THUMBDIR, SHARDDIR):
+            script = parts[0] == SHARDDIR
+        elif ext in AUDIO_EXTS:
+            return self.root / rel, False
+        else:
+            return None, False
+        return self.out_dir / rel, script
+
+    def etag(self, f, st: os.stat_result, script: bool) -> str:
+        if script:
+            m = _VERSION_RE.search(f.read(256))
+            f.seek(0)
+            if m:
+                return f'"{m.group(1).decode()}-{st.st_size:x}"'
+        return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    def accepts(self) -> set[str]:
+        accepted = set()
+        for item in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = item.partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                accepted.add(name.strip().lower())
+        return accepted
+
+    def respond(self, head: bool):
+        path, script = self.resolve()
+        try:
+            f = open(path, "rb") if path else None
+        except OSError:
+            f = None
+        if f is None:
+            self.send_error(404)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            etag = self.etag(f, st, script)
+            encoding = None
+            if script and "Range" not in self.headers:
+                accepted = self.accepts()
+                for suffix, name in COMPRESSED:
+                    if name not in accepted:
+                        continue
+                    try:
+                        variant = open(f"{path}{suffix}", "rb")
+                    except OSError:
+                        continue
+                    vst = os.fstat(variant.fileno())
+                    if vst.st_mtime_ns >= st.st_mtime_ns:
+                        f.close()
+                        f, st, encoding = variant, vst, name
+                        etag = f'{etag[:-1]}.{name}"'
+                        break
+                    variant.close()
+
+            if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            size, start, end = st.st_size, 0, st.st_size - 1
+            rng = self.headers.get("Range")
+            m = re.fullmatch(r"bytes=(\d*)-(\d*)", rng.strip()) if rng else None
+            if m and any(m.groups()) and self.headers.get("If-Range", etag) == etag:
+                if m.group(1):
+                    start = int(m.group(1))
+                    end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+                else:
+                    start = max(0, size - int(m.group(2)))
+                if start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            ctype = SERVE_TYPES.get(path.suffix.lower()) or mimetypes.guess_type(path.name)[0]
+            self.send_header("Content-Type", ctype or "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            # thumbs/ and shards are content-addressed; everything else revalidates
+            immutable = path.parent.name in (THUMBDIR, SHARDDIR) and path.parent.parent == self.out_dir
+            self.send_header("Cache-Control", "max-age=31536000, immutable" if immutable else "no-cache")
+            if script:
+                self.send_header("Vary", "Accept-Encoding")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.end_headers()
+            if not head and end >= start:
+                try:
+                    self.connection.sendfile(f, start, end - start + 1)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass                # a seeking client drops the old request
+
+def make_server(out_dir: Path, root: Path, bind: str, port: int,
+                verbose: bool = False) -> http.server.ThreadingHTTPServer:
+    handler = type("Handler", (PlayerHandler,), {"out_dir": out_dir, "root": root, "verbose": verbose})
+    return http.server.ThreadingHTTPServer((bind, port), handler)
+
+# ── Watch mode ────────────────────────────────────────────────────────────────
+def _under(rel: str, dirs: set[str]) -> bool:
+    """Whether some parent folder of rel is in dirs."""
+    while "/" in rel:
+        rel = rel.rsplit("/", 1)[0]
+        if rel in dirs:
+            return True
+    return False
+
+def rescan(root: Path, args, cache: ScanCache, touched: set[str]) -> tuple[int, int]:
+    """Bring cache up to date for just the touched root-relative paths.
+
+    A touched folder is walked again and anything the cache held below it
+    that is gone is dropped; a touched cover image re-resolves folder art for
+    the audio files next to it. Returns (re-scanned, removed) track counts.
+    """
+    path_filter = PathFilter(args.exclude, args.include)
+    check: dict[str, bool] = {}         # rel → re-scan even if unchanged (folder art)
+    dirs: set[str] = set()
+    found: set[str] = set()
+    for rel in touched:
+        path = root / rel
+        ext = os.path.splitext(rel)[1].lower()
+        if ext in ART_EXTS:
+            folder = rel.rpartition("/")[0]
+            try:
+                with os.scandir(path.parent) as it:
+                    for entry in it:
+                        if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTS:
+                            check[f"{folder}/{entry.name}" if folder else entry.name] = True
+            except OSError:
+                pass
+        elif path.is_dir():
+            if path_filter.enters(rel):
+                dirs.add(rel)
+                for r, _ in iter_audio_files(root, path_filter, rel):
+                    found.add(r)
+                    check.setdefault(r, False)
+        elif not path.exists():
+            dirs.add(rel)                   # a folder or file that went away
+        elif ext in AUDIO_EXTS:
+            check.setdefault(rel, False)
+
+    gone = {r for r in cache.entries if r not in found and (r in dirs or _under(r, dirs))}
+    todo: list[tuple[str, list[int]]] = []
+    for rel, force in check.items():
+        if rel in found or path_filter.accepts(rel, rel.rpartition("/")[2]):
+            try:
+                sig = file_sig(os.stat(root / rel))
+            except OSError:
+                gone.add(rel)
+                continue
+            entry = cache.entries.get(rel)
+            if force or entry is None or entry["sig"] != sig:
+                todo.append((rel, sig))
+    gone &= cache.entries.keys()
+    for rel in gone:
+        del cache.entries[rel]
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    folder_art_cache: dict = {}
+    covers = FolderCovers(root)
+    scanned = scan_files([root / rel for rel, _ in todo], root, args, jobs,
+                         ArtSettings.from_args(args), folder_art_cache, cache.art)
+    changed = 0
+    for (rel, sig), track in zip(todo, scanned):
+        old = cache.entries.get(rel)
+        changed += old is None or ((old["track"] and fingerprint(old["track"]))
+                                   != (track and fingerprint(track)))
+        cache.store(rel, sig, track, None if args.no_art else covers.needed(track, folder_art_cache))
+    if todo and not args.verbose:
+        print()
+    return changed, len(gone)
+
+class InotifyWatcher:
+    """Linux inotify through ctypes, one watch per folder below root.
+
+    Only completed writes, creates, deletes and renames are asked for, so a
+    file being copied in is reported once it is closed.
+    """
+    IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_Q_OVERFLOW, IN_IGNORED = 0x100, 0x200, 0x4000, 0x8000
+    IN_ONLYDIR, IN_ISDIR = 0x1000000, 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+    kind = "inotify"
+
+    def __init__(self, root: Path, path_filter: PathFilter, skip: set[str]):
+        self.root, self.path_filter, self.skip = root, path_filter, skip
+        if not sys.platform.startswith("linux"):
+            raise OSError(f"not available on {sys.platform}")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: dict[int, str] = {}      # watch descriptor → root-relative folder
+        self.add_tree("")
+
+    def add_tree(self, rel_dir: str):
+        """Watch rel_dir and every folder below it that the scan would enter."""
+        stack = [rel_dir]
+        while stack:
+            rel_dir = stack.pop()
+            wd = self._add_watch(self.fd, os.fsencode(os.path.join(self.root, rel_dir)), self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "out of inotify watches (fs.inotify.max_user_watches)")
+                continue                    # gone again already
+            self.dirs[wd] = rel_dir
+            try:
+                with os.scandir(os.path.join(self.root, rel_dir)) as it:
+                    for entry in it:
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if (entry.is_dir(follow_symlinks=False) and rel not in self.skip
+                                and self.path_filter.enters(rel)):
+                            stack.append(rel)
+            except OSError:
+                continue
+
+    def drop_tree(self, rel_dir: str):
+        for wd, rel in list(self.dirs.items()):
+            if rel == rel_dir or rel.startswith(rel_dir + "/"):
+                self._rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def wait(self, timeout: float | None) -> set[str] | None:
+        """Root-relative paths touched within timeout seconds (None: block), or
+        None if the kernel queue overflowed and events were lost."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        touched: set[str] = set()
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            off = 0
+            while off < len(buf):
+                wd, mask, _, size = struct.unpack_from("iIII", buf, off)
+                name = os.fsdecode(buf[off + 16:off + 16 + size].rstrip(b"\0"))
+                off += 16 + size
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & self.IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                parent = self.dirs.get(wd)
+                if parent is None or not name:
+                    continue
+                rel = f"{parent}/{name}" if parent else name
+                if mask & self.IN_ISDIR:
+                    if rel in self.skip or not self.path_filter.enters(rel):
+                        continue
+                    if mask & self.IN_MOVED_FROM:
+                        self.drop_tree(rel)
+                    elif mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        try:
+                            self.add_tree(rel)
+                        except OSError as e:
+                            print(f"⚠  {e}: {rel} is not watched", file=sys.stderr)
+                    touched.add(rel)
+                elif os.path.splitext(name)[1].lower() in AUDIO_EXTS | ART_EXTS:
+                    touched.add(rel)
+        return None if overflow else touched
+
+class PollWatcher:
+    """Fallback for when inotify is missing or not wanted: walk the tree every
+    interval seconds.
+
+    Only folders whose mtime moved are looked into (that covers adds, removes
+    and renames); files that were rewritten in place are found by comparing
+    their signature with the scan cache. Such a file is reported once per
+    signature, not on every walk until refresh() catches the cache up, so
+    short intervals still leave the lull the debounce waits for.
+    """
+    kind = "polling"
+
+    def __init__(self, root: Path, path_filter: PathFilter, skip: set[str],
+                 cache: ScanCache, interval: float):
+        self.root, self.path_filter, self.skip = root, path_filter, skip
+        self.cache, self.interval = cache, interval
+        self.dirs: dict[str, int] = {}      # folder → mtime_ns at the last walk
+        self.reported: dict[str, list[int]] = {}   # rewritten file → signature already reported
+        self.poll()
+        self.due = time.monotonic() + interval
+
+    def wait(self, timeout: float | None) -> set[str]:
+        delay = self.due - time.monotonic()
+        if timeout is not None and timeout < delay:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, delay))
+        self.due = time.monotonic() + self.interval
+        return self.poll()
+
+    def poll(self) -> set[str]:
+        touched: set[str] = set()
+        moved: set[str] = set()
+        dirs: dict[str, int] = {}
+        reported: dict[str, list[int]] = {}
+        try:
+            stack = [("", os.stat(self.root).st_mtime_ns)]
+        except OSError:
+            return touched
+        while stack:
+            rel_dir, mtime = stack.pop()
+            dirs[rel_dir] = mtime
+            changed = bool(self.dirs) and self.dirs.get(rel_dir) != mtime
+            if changed:
+                moved.add(rel_dir)
+            try:
+                it = os.scandir(os.path.join(self.root, rel_dir))
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    try:
+                        if ext in AUDIO_EXTS and entry.is_file():
+                            cached = self.cache.entries.get(rel)
+                            if cached is None:
+                                if changed:
+                                    touched.add(rel)
+                            elif cached["sig"] != (sig := file_sig(entry.stat())):
+                                if self.reported.get(rel) != sig:
+                                    touched.add(rel)
+                                reported[rel] = sig
+                        elif ext in ART_EXTS and changed and entry.is_file():
+                            touched.add(rel)
+                        elif (entry.is_dir(follow_symlinks=False) and rel not in self.skip
+                                and self.path_filter.enters(rel)):
+                            st = entry.stat(follow_symlinks=False)
+                            if self.dirs and rel not in self.dirs:
+                                touched.add(rel)        # new folder: rescan() walks it whole
+                            stack.append((rel, st.st_mtime_ns))
+                    except OSError:
+                        continue
+        if self.dirs:
+            touched |= self.dirs.keys() - dirs.keys()   # folders that went away
+            # files that went away from a folder that is still there
+            touched |= {r for r in self.cache.entries
+                        if r.rpartition("/")[0] in moved and not os.path.exists(self.root / r)}
+        self.dirs, self.reported = dirs, reported
+        return touched
+
+def _output_dirs(root: Path, out_dir: Path) -> set[str]:
+    """Root-relative output subfolders a watcher must ignore, or it would see its own writes."""
+    try:
+        rel = out_dir.relative_to(root).as_posix()
+    except ValueError:
+        return set()
+    prefix = "" if rel == "." else rel + "/"
+    return {prefix + THUMBDIR, prefix + SHARDDIR}
+
+def refresh(root: Path, out_dir: Path, args, cache: ScanCache, touched: set[str] | None):
+    """Re-scan what changed (everything, for touched=None) and rewrite the data files."""
+    t0 = time.time()
+    if touched is None:
+        print("\nToo many changes at once — checking the whole library")
+        cache.seen.clear()
+        for _ in scan(root, args, cache):
+            pass
+        cache.prune()
+    else:
+        changed, removed = rescan(root, args, cache, touched)
+        if not changed and not removed:
+            return
+        print(f"~{changed} −{removed} tracks")
+    tracks = sort_library(e["track"] for e in cache.entries.values() if e["track"])
+    cache.art = referenced_art(tracks, cache.art)   # drop covers nothing uses any more
+    cache.save()
+    write_datafile(tracks, cache.art, out_dir, root, args.art_mode, ArtSettings.from_args(args),
+                   args.data_format, args.shards, args.delta, args.delta_compact, args.precompress)
+    if THUMB_CACHE:
+        THUMB_CACHE.evict()
+    print(f"✓ Updated in {time.time() - t0:.1f}s")
+
+def watch(root: Path, out_dir: Path, args, cache: ScanCache):
+    """--watch: rewrite the data files after every burst of changes under root.
+
+    Events are coalesced into one set of touched paths until WATCH_DEBOUNCE
+    passes without any (or WATCH_MAX_WAIT since the first); a burst that
+    touches more than WATCH_MAX_PENDING paths, or overflows the inotify
+    queue, falls back to a full cached scan rather than growing the set.
+    """
+    path_filter = PathFilter(args.exclude, args.include)
+    skip = _output_dirs(root, out_dir)
+    watcher = None
+    if args.watch_poll is None:
+        try:
+            watcher = InotifyWatcher(root, path_filter, skip)
+        except (OSError, AttributeError) as e:
+            print(f"⚠  inotify unavailable ({e}); polling every {WATCH_POLL}s", file=sys.stderr)
+    if watcher is None:
+        watcher = PollWatcher(root, path_filter, skip, cache, args.watch_poll or WATCH_POLL)
+    print(f"\nWatching {root} ({watcher.kind}) — Ctrl+C to stop")
+
+    pending: set[str] | None = set()
+    first = None
+    try:
+        while True:
+            got = watcher.wait(None if first is None else WATCH_DEBOUNCE)
+            if got is None or got:
+                if first is None:
+                    first = time.monotonic()
+                pending = None if got is None or pending is None else pending | got
+                if pending is not None and len(pending) > WATCH_MAX_PENDING:
+                    pending = None
+                if time.monotonic() - first < WATCH_MAX_WAIT:
+                    continue
+            elif first is None:
+                continue
+            refresh(root, out_dir, args, cache, pending)
+            pending, first = set(), None
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
 def main():
+    global THUMB_CACHE
     args = parse_args()
 
     # Take root from cli arg or current dir
@@ -1053,26 +3545,72 @@ def main():
         print("❌  mutagen not installed — tags will be minimal. Run: pip install mutagen")
     if not args.no_art and not HAS_PIL:
         print("❌  Pillow not installed — art will be read raw (no resize). Run: pip install Pillow")
+    if args.serve is not None:
+        args.precompress = True
+    if args.delta and args.shards:
+        print("✗ --delta cannot be combined with --shards", file=sys.stderr)
+        sys.exit(1)
+    if not args.no_art and HAS_PIL:
+        Image.init()
+        fmt = THUMB_FORMATS[args.thumb_format]
+        if fmt not in Image.SAVE:
+            print(f"✗ This Pillow build cannot write {fmt} thumbnails", file=sys.stderr)
+            sys.exit(1)
 
     print(f"Root   : {root}")
     print(f"Output : {out_dir}")
     if args.exclude:
         print(f"Exclude: {', '.join(args.exclude)}")
-
-    # Scan
-    tracks = scan(root, args)
-    if not tracks and not args.force_rescan:
+    if args.include:
+        print(f"Include: {', '.join(args.include)}")
+
+    if not args.no_art and not args.no_thumb_cache:
+        THUMB_CACHE = ThumbCache(Path(args.thumb_cache).expanduser(), args.thumb_cache_mb * 1024 * 1024)
+
+    # Scan (reusing unchanged files from the previous run unless --force-rescan)
+    cache = ScanCache(out_dir / CACHEFILE, cache_settings(args))
+    if not args.force_rescan:
+        cache.load()
+    tracks = sort_library(scan(root, args, cache))
+    art = referenced_art(tracks, cache.art)
+    pruned = cache.prune()
+    cache.save()
+    print(f"✓ Cache: {cache.hits} reused, {cache.misses} re-scanned, {pruned} pruned")
+    if THUMB_CACHE:
+        evicted = THUMB_CACHE.evict()
+        print(f"✓ Thumbnail cache: {THUMB_CACHE.hits} hits, {THUMB_CACHE.misses} misses"
+              + (f", {evicted} evicted" if evicted else ""))
+    if not tracks and not args.force_rescan and not args.watch:
         sys.exit(0)
 
-    write_datafile(tracks, out_dir, root)
+    write_datafile(tracks, art, out_dir, root, args.art_mode, ArtSettings.from_args(args),
+                   args.data_format, args.shards, args.delta, args.delta_compact, args.precompress)
 
     # Write HTML (unless --no-html)
     if not args.no_html:
         write_html(out_dir)
 
-    out_abs = str((out_dir / HTMLFILE).absolute())
-    print(f"\nDone. Open {out_abs} in your browser.")
-    webbrowser.open_new_tab(f'file://{out_abs}')
+    server = None
+    if args.serve is not None:
+        server = make_server(out_dir, root, args.bind, args.serve, args.verbose)
+        host = "localhost" if args.bind in ("0.0.0.0", "::") else args.bind
+        url = f"http://{host}:{server.server_address[1]}/"
+        print(f"\nDone. Serving {out_dir} (audio from {root}) at {url}")
+    else:
+        out_abs = str((out_dir / HTMLFILE).absolute())
+        url = f"file://{out_abs}"
+        print(f"\nDone. Open {out_abs} in your browser.")
+    webbrowser.open_new_tab(url)
+
+    if args.watch:
+        if server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        watch(root, out_dir, args, cache)
+    elif server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped serving.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+sys.path.insert(0, str(REPO / "benchmarks"))
+
+@pytest.fixture(scope="session")
+def library(tmp_path_factory) -> Path:
+    """A small synthetic library (synthlib.py): every format, embedded art and folder covers."""
+    pytest.importorskip("mutagen")
+    pytest.importorskip("PIL")
+    import synthlib
+    root = tmp_path_factory.mktemp("library")
+    synthlib.make_library(root, tracks=60, folders=9, mix=synthlib.parse_mix("mp3=3,flac=2,ogg=1,m4a=1"),
+                          embedded=0.5, covers=0.5, art_sizes=(120, 300), seed=7)
+    return root
@@ -0,0 +1,37 @@
+"""--art-mode files / sprites: a write cut short never leaves a thumbnail
+under its final name, and the next run completes it."""
+
+from pathlib import Path
+
+import pytest
+
+import mugal26
+from util import scan_library
+
+@pytest.mark.parametrize("mode", ["files", "sprites"])
+def test_interrupted_write(library, tmp_path, monkeypatch, mode):
+    _, art = scan_library(library)
+    (tmp_path / mugal26.THUMBDIR).mkdir()
+    (tmp_path / mugal26.THUMBDIR / "mine.jpg").write_bytes(b"not ours")
+
+    write_bytes = Path.write_bytes
+
+    def fail(self, data):
+        write_bytes(self, data[:len(data) // 2])
+        raise KeyboardInterrupt
+    monkeypatch.setattr(Path, "write_bytes", fail)
+    with pytest.raises(KeyboardInterrupt):
+        mugal26.write_art(art, tmp_path, mode, mugal26.ArtSettings())
+    monkeypatch.undo()
+    names = {f.name for f in (tmp_path / mugal26.THUMBDIR).iterdir()}
+    assert names == {"mine.jpg", next(n for n in names if n.endswith(".tmp"))}
+
+    table, sheets = mugal26.write_art(art, tmp_path, mode, mugal26.ArtSettings())
+    urls = set(table.values()) if mode == "files" else {s[0] for s in sheets}
+    assert {f.name for f in (tmp_path / mugal26.THUMBDIR).iterdir()} == \
+           {"mine.jpg", *(u.rsplit("/", 1)[1] for u in urls)}
+    for url in urls:
+        data = (tmp_path / url).read_bytes()
+        if mode == "files":
+            assert mugal26.art_id(data) + Path(url).suffix == Path(url).name
+        assert data.endswith(b"\xff\xd9")            # a whole JPEG
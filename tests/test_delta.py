@@ -0,0 +1,74 @@
+"""--delta: the base audiodata.js with audiodata.delta.js applied the way
+the page's useDelta() does gives exactly what a full write would."""
+
+import shutil
+
+import pytest
+
+import mugal26
+from util import TRACK_FIELDS, decode_tracks, load_script, scan_library, write_datafile
+
+def apply_delta(base: dict, d: dict) -> tuple[list[dict], dict]:
+    """(tracks, art) of base after useDelta(d)."""
+    tracks, fresh = decode_tracks(base), d["added"] + d["changed"]
+    out = [(fresh if src else tracks)[i] for src, start, count in d["order"] for i in range(start, start + count)]
+    assert len(out) == d["count"]
+    return [{k: t[k] for k in TRACK_FIELDS} for t in out], {**base["art"], **d["art"]}
+
+def write(root, out_dir, data_format: str, delta: bool) -> str:
+    tracks, art = scan_library(root)
+    return write_datafile(tracks, art, out_dir, root, data_format=data_format, delta=delta, delta_compact=100)
+
+def check(root, out_dir, data_format: str, tmp_path):
+    """Compare base + delta in out_dir with a full write of root."""
+    full_dir = tmp_path / "full"
+    shutil.rmtree(full_dir, ignore_errors=True)
+    full_dir.mkdir()
+    write(root, full_dir, data_format, delta=False)
+    full = load_script(full_dir / mugal26.DATAFILE)
+    base = load_script(out_dir / mugal26.DATAFILE)
+    d = load_script(out_dir / mugal26.DELTAFILE)
+
+    assert d["base"] == base["version"]
+    assert d["version"] == full["version"]
+    tracks, art = apply_delta(base, d)
+    assert tracks == decode_tracks(full)
+    assert (d["tree"], d["rootCount"]) == (full["tree"], full["rootCount"])
+    for t in tracks:
+        if t["art"] is not None:
+            assert art[t["art"]] == full["art"][t["art"]], t["path"]
+
+@pytest.mark.parametrize("data_format", ["rows", "columns"])
+def test_delta_matches_full_write(library, tmp_path, data_format):
+    from mutagen import File
+    from PIL import Image
+
+    root, out_dir = tmp_path / "library", tmp_path / "out"
+    shutil.copytree(library, root)
+    out_dir.mkdir()
+    base_version = write(root, out_dir, data_format, delta=True)
+    assert not (out_dir / mugal26.DELTAFILE).exists()
+
+    mp3s = sorted(root.rglob("*.mp3"))
+    mp3s[1].unlink()
+    retag = File(mp3s[2], easy=True)
+    retag["title"] = "Zz moved to the end"
+    retag.save()
+    shutil.copy(mp3s[3], root / "00 Loose.mp3")                # root track: sorts first
+    (root / "Zz New" / "Album").mkdir(parents=True)
+    shutil.copy(mp3s[4], root / "Zz New" / "Album" / "01 Copy.mp3")
+    for n, cover in enumerate(sorted(root.rglob("cover.jpg"))):   # used where tracks have no embedded art
+        Image.new("RGB", (200, 200), (200, 40, n)).save(cover)
+
+    assert write(root, out_dir, data_format, delta=True) != base_version
+    d = load_script(out_dir / mugal26.DELTAFILE)
+    assert (len(d["added"]), len(d["removed"])) == (2, 1)
+    assert d["changed"] and d["art"]
+    check(root, out_dir, data_format, tmp_path)
+
+    # A second delta is still against the base and covers both rounds.
+    (root / "00 Loose.mp3").unlink()
+    shutil.copy(mp3s[5], root / "Zz New" / "02 Folder track.mp3")
+    write(root, out_dir, data_format, delta=True)
+    assert load_script(out_dir / mugal26.DELTAFILE)["base"] == base_version
+    check(root, out_dir, data_format, tmp_path)
@@ -0,0 +1,58 @@
+"""Tracks come out in library_order() and every folder of the tree is one
+[start, end) range of them, in all three output layouts."""
+
+import shutil
+
+import pytest
+
+import mugal26
+from util import decode_tracks, load_script, scan_library, write_datafile
+
+# Plain string order would put "Rock Live" and "Rock-Live" between "Rock" and "Rock/Sub".
+EXTRA = ["00 root.mp3", "zz root.mp3", "Rock/01 a.mp3", "Rock/Sub/01 b.mp3", "Rock Live/01 c.mp3",
+         "Rock-Live/01 d.mp3", "rock/x/01 e.mp3", "Ärzte/01 f.mp3", "B/01 g.mp3", "a/01 h.mp3"]
+
+@pytest.fixture(scope="module")
+def root(library, tmp_path_factory):
+    root = tmp_path_factory.mktemp("ordered") / "library"
+    shutil.copytree(library, root)
+    sample = next(root.rglob("*.mp3"))
+    for rel in EXTRA:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(sample, root / rel)
+    return root
+
+def written_tracks(out_dir) -> tuple[dict, list[dict]]:
+    p = load_script(out_dir / mugal26.DATAFILE)
+    if "shards" not in p:
+        return p, decode_tracks(p)
+    tracks = []
+    for entry in p["shards"]:
+        assert entry["start"] == len(tracks)
+        shard = decode_tracks(load_script(out_dir / entry["file"]))
+        assert len(shard) == entry["count"]
+        assert {t["folder"].split("/", 1)[0] for t in shard} == {entry["top"]}
+        tracks += shard
+    return p, tracks
+
+@pytest.mark.parametrize("data_format, shards", [("rows", False), ("columns", False), ("rows", True), ("columns", True)])
+def test_folder_ranges(root, tmp_path, data_format, shards):
+    scanned, art = scan_library(root)
+    write_datafile(scanned, art, tmp_path, root, data_format=data_format, shards=shards)
+    p, tracks = written_tracks(tmp_path)
+
+    assert len(tracks) == p["count"] == len(scanned)
+    assert [t["path"] for t in tracks] == [t["path"] for t in sorted(scanned, key=mugal26.library_order)]
+    root_count = p["rootCount"]
+    assert root_count == 2
+    assert all(t["folder"] == "" for t in tracks[:root_count])
+    assert all(t["folder"] for t in tracks[root_count:])
+
+    paths: list[str] = []
+    for parent, seg, start, end in p["tree"]:
+        path = seg if parent < 0 else f"{paths[parent]}/{seg}"
+        paths.append(path)
+        inside = [t["path"] for t in tracks if t["folder"] == path or t["folder"].startswith(path + "/")]
+        assert [t["path"] for t in tracks[start:end]] == inside, path
+    assert set(paths) >= {t["folder"] for t in tracks[root_count:]}
+    assert len(paths) == len(set(paths))
@@ -0,0 +1,64 @@
+"""PathFilter and the walker against the per-file fnmatch rules they replaced:
+a glob excludes (or includes) a file when it matches the root-relative
+path or the bare file name."""
+
+import fnmatch
+
+import pytest
+
+import mugal26
+
+FILES = [
+    "top.mp3", "top.txt", "A/b.MP3", "A/B/C/deep.opus", "A/B/cover.jpg",
+    "Podcasts/ep1.mp3", "Podcasts/2020/ep2.mp3", "Podcasts Old/ep0.mp3",
+    "Rock/Live at Home/01 a.mp3", "Rock/Studio/01 b.flac", "Rock/Studio/02 c.wav",
+    "Jazz/Live/x.ogg", "Jazz/Live/sub/y.m4a", "Mixed/Live Podcasts/z.m4a", ".hidden/h.mp3",
+]
+
+EXCLUDES = [
+    [], ["*.wav"], ["Podcasts/*"], ["*/Live*"], ["Pod*"], ["*a*"], ["Rock/*", "*.flac"],
+    ["top.mp3"], ["A/B"], ["A/B/*"], ["*Live*"], ["?op.mp3"], ["[RJ]*"], ["*/sub/*"], ["*"],
+]
+INCLUDES = [[], ["*.flac"], ["Jazz/*"], ["Rock/*", "*.ogg"], ["ep?.mp3"], ["*/Live/*"]]
+
+@pytest.fixture(scope="module")
+def tree(tmp_path_factory):
+    root = tmp_path_factory.mktemp("tree")
+    for rel in FILES:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(b"")
+    return root
+
+def fnmatch_walk(root, exclude, include) -> set[str]:
+    def hit(rel, name, patterns):
+        return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+    found = set()
+    for path in root.rglob("*"):
+        rel = path.relative_to(root).as_posix()
+        if not path.is_file() or path.suffix.lower() not in mugal26.AUDIO_EXTS:
+            continue
+        if hit(rel, path.name, exclude) or (include and not hit(rel, path.name, include)):
+            continue
+        found.add(rel)
+    return found
+
+@pytest.mark.parametrize("include", INCLUDES)
+@pytest.mark.parametrize("exclude", EXCLUDES)
+def test_walk_matches_fnmatch(tree, exclude, include):
+    walked = {rel for rel, _ in mugal26.iter_audio_files(tree, mugal26.PathFilter(exclude, include))}
+    assert walked == fnmatch_walk(tree, exclude, include)
+
+@pytest.mark.parametrize("exclude, folder, pruned", [
+    (["Podcasts/*"], "Podcasts", True),
+    (["Podcasts/*"], "Podcasts Old", False),
+    (["*/Live*"], "Rock/Live at Home", True),
+    (["*/Live*"], "Rock", False),
+    (["*.wav"], "Rock", False),
+    (["A/B"], "A/B", False),        # no trailing star: only a file named A/B would match
+])
+def test_prune(exclude, folder, pruned):
+    assert mugal26.PathFilter(exclude).enters(folder) is not pruned
+
+def test_walk_from_subfolder(tree):
+    walked = {rel for rel, _ in mugal26.iter_audio_files(tree, mugal26.PathFilter(["*.wav"]), start="Rock")}
+    assert walked == {"Rock/Live at Home/01 a.mp3", "Rock/Studio/01 b.flac"}
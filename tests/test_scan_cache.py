@@ -0,0 +1,82 @@
+"""The incremental scan cache reuses a track only while the files that
+shaped it are unchanged, folder cover images included."""
+
+import contextlib
+import io
+import shutil
+
+import pytest
+
+import mugal26
+from util import mugal_args
+
+def run(root, cache_file, jobs: int = 1) -> tuple[dict, mugal26.ScanCache]:
+    """One cached scan of root, as main() does it; returns (path → track, cache)."""
+    args = mugal_args(str(root), "--jobs", str(jobs))
+    cache = mugal26.ScanCache(cache_file, mugal26.cache_settings(args)).load()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracks = {t["path"]: t for t in mugal26.scan(root, args, cache)}
+    cache.prune()
+    cache.save()
+    return tracks, cache
+
+@pytest.fixture
+def root(library, tmp_path):
+    """The library plus a folder of tracks without embedded art or a cover."""
+    from mutagen.id3 import ID3
+    root = tmp_path / "library"
+    shutil.copytree(library, root)
+    (root / "Bare").mkdir()
+    for n, src in enumerate(sorted(library.rglob("*.mp3"))[:3]):
+        dest = root / "Bare" / f"0{n} Track.mp3"
+        shutil.copy(src, dest)
+        tags = ID3(dest)
+        tags.delall("APIC")
+        tags.save()
+    return root
+
+def test_unchanged_run_is_all_hits(root, tmp_path):
+    first, cache = run(root, tmp_path / "cache.json")
+    again, cache = run(root, tmp_path / "cache.json")
+    assert (cache.misses, cache.hits) == (0, len(first))
+    assert again == first
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_cover_added_and_replaced(root, tmp_path, jobs):
+    from PIL import Image
+    bare = [f"Bare/0{n} Track.mp3" for n in range(3)]
+    tracks, _ = run(root, tmp_path / "cache.json", jobs)
+    assert [tracks[p]["art"] for p in bare] == [None] * 3
+
+    Image.new("RGB", (200, 200), (10, 20, 30)).save(root / "Bare" / "cover.jpg")
+    tracks, cache = run(root, tmp_path / "cache.json", jobs)
+    added = tracks[bare[0]]["art"]
+    assert added is not None
+    assert [tracks[p]["art"] for p in bare] == [added] * 3
+    assert cache.misses == 3
+
+    Image.new("RGB", (200, 200), (200, 20, 30)).save(root / "Bare" / "cover.jpg")
+    tracks, _ = run(root, tmp_path / "cache.json", jobs)
+    replaced = tracks[bare[0]]["art"]
+    assert replaced not in (None, added)
+    assert [tracks[p]["art"] for p in bare] == [replaced] * 3
+
+    (root / "Bare" / "cover.jpg").unlink()
+    tracks, _ = run(root, tmp_path / "cache.json", jobs)
+    assert [tracks[p]["art"] for p in bare] == [None] * 3
+
+def test_embedded_art_ignores_covers(root, tmp_path):
+    """Tracks with their own art are not re-scanned when a cover changes next to them."""
+    from mutagen.id3 import ID3
+    from PIL import Image
+    own = root / "Own art"
+    own.mkdir()
+    for n, src in enumerate([p for p in sorted(root.rglob("*.mp3")) if ID3(p).getall("APIC")][:2]):
+        shutil.copy(src, own / f"0{n} Track.mp3")
+    Image.new("RGB", (200, 200), (1, 2, 3)).save(own / "cover.jpg")
+    tracks, _ = run(root, tmp_path / "cache.json")
+
+    Image.new("RGB", (200, 200), (3, 2, 1)).save(own / "cover.jpg")
+    again, cache = run(root, tmp_path / "cache.json")
+    assert cache.misses == 0
+    assert again == tracks
@@ -0,0 +1,136 @@
+"""--serve: byte ranges, ETag revalidation, precompressed data scripts and
+the paths that must not be served."""
+
+import gzip
+import http.client
+import os
+import threading
+import urllib.parse
+
+import pytest
+
+import mugal26
+from util import scan_library, write_datafile
+
+@pytest.fixture(scope="module")
+def site(library, tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp("site")
+    tracks, art = scan_library(library)
+    version = write_datafile(tracks, art, out_dir, library, compress=True)
+    mugal26.write_html(out_dir)
+    (out_dir / ".audiodata.cache.json").write_text("{}")
+    server = mugal26.make_server(out_dir, library, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    audio = sorted(library.rglob("*.mp3"))[0]
+    yield {"port": server.server_address[1], "out_dir": out_dir, "version": version,
+           "audio": "/" + urllib.parse.quote(audio.relative_to(library).as_posix()), "data": audio.read_bytes()}
+    server.shutdown()
+    server.server_close()
+
+def get(site, path: str, method: str = "GET", **headers) -> tuple[int, dict, bytes]:
+    conn = http.client.HTTPConnection("127.0.0.1", site["port"], timeout=10)
+    try:
+        conn.request(method, path, headers={k.replace("_", "-"): v for k, v in headers.items()})
+        resp = conn.getresponse()
+        return resp.status, dict(resp.getheaders()), resp.read()
+    finally:
+        conn.close()
+
+def test_audio(site):
+    status, headers, body = get(site, site["audio"])
+    assert status == 200
+    assert body == site["data"]
+    assert headers["Accept-Ranges"] == "bytes"
+    assert headers["Content-Length"] == str(len(body))
+    assert headers["Cache-Control"] == "no-cache"
+    status, headers, body = get(site, site["audio"], "HEAD")
+    assert (status, headers["Content-Length"], body) == (200, str(len(site["data"])), b"")
+
+@pytest.mark.parametrize("spec, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=100-", 100, None),
+    ("bytes=-50", -50, None),
+    ("bytes=10-99999999", 10, None),
+    ("bytes=0-0", 0, 0),
+])
+def test_range(site, spec, start, end):
+    data = site["data"]
+    size = len(data)
+    start %= size
+    end = size - 1 if end is None else end
+    status, headers, body = get(site, site["audio"], Range=spec)
+    assert status == 206
+    assert headers["Content-Range"] == f"bytes {start}-{end}/{size}"
+    assert body == data[start:end + 1]
+
+@pytest.mark.parametrize("spec", ["bytes={size}-", "bytes={size}-{size}", "bytes=-0"])
+def test_range_not_satisfiable(site, spec):
+    size = len(site["data"])
+    status, headers, body = get(site, site["audio"], Range=spec.format(size=size))
+    assert status == 416
+    assert headers["Content-Range"] == f"bytes */{size}"
+    assert body == b""
+
+@pytest.mark.parametrize("spec", ["bytes=0-1,5-6", "items=0-1", "bytes=-", "bytes=a-b"])
+def test_range_ignored(site, spec):
+    status, _, body = get(site, site["audio"], Range=spec)
+    assert (status, body) == (200, site["data"])
+
+def test_if_none_match(site):
+    etag = get(site, site["audio"])[1]["ETag"]
+    status, headers, body = get(site, site["audio"], If_None_Match=f'"other", {etag}')
+    assert (status, headers["ETag"], body) == (304, etag, b"")
+    assert get(site, site["audio"], If_None_Match='"other"')[0] == 200
+
+def test_if_range(site):
+    etag = get(site, site["audio"])[1]["ETag"]
+    assert get(site, site["audio"], Range="bytes=0-9", If_Range=etag)[0] == 206
+    status, _, body = get(site, site["audio"], Range="bytes=0-9", If_Range='"stale-1"')
+    assert (status, body) == (200, site["data"])
+
+def test_script_etag_is_version(site):
+    status, headers, body = get(site, "/" + mugal26.DATAFILE)
+    assert status == 200
+    assert headers["ETag"] == f'"{site["version"]}-{len(body):x}"'
+    assert headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in headers
+    assert body == (site["out_dir"] / mugal26.DATAFILE).read_bytes()
+
+def test_precompressed(site):
+    plain = (site["out_dir"] / mugal26.DATAFILE).read_bytes()
+    etag = get(site, "/" + mugal26.DATAFILE)[1]["ETag"]
+    status, headers, body = get(site, "/" + mugal26.DATAFILE, Accept_Encoding="br;q=0, gzip")
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["ETag"] == f'{etag[:-1]}.gzip"'
+    assert gzip.decompress(body) == plain
+    assert get(site, "/" + mugal26.DATAFILE, Accept_Encoding="gzip", If_None_Match=headers["ETag"])[0] == 304
+    # a range is always of the identity encoding
+    status, headers, body = get(site, "/" + mugal26.DATAFILE, Accept_Encoding="gzip", Range="bytes=0-9")
+    assert (status, body) == (206, plain[:10])
+    assert "Content-Encoding" not in headers
+
+def test_stale_variant_not_served(site):
+    variant = site["out_dir"] / f"{mugal26.DATAFILE}.gz"
+    st = variant.stat()
+    os.utime(variant, ns=(st.st_atime_ns, (site["out_dir"] / mugal26.DATAFILE).stat().st_mtime_ns - 10**9))
+    try:
+        headers = get(site, "/" + mugal26.DATAFILE, Accept_Encoding="gzip")[1]
+        assert "Content-Encoding" not in headers
+    finally:
+        os.utime(variant, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+@pytest.mark.parametrize("path", [
+    "/.audiodata.cache.json", "/../x.mp3", "/%2e%2e/x.mp3", "/Artist/../../x.mp3", "/a%00b.mp3",
+    "/x.mp3%00.js", "/missing.mp3", "/notes.txt", "/sub/audiodata.js", "/" + mugal26.DATAFILE + ".gz", "//x.mp3",
+])
+def test_not_served(site, path):
+    assert get(site, path)[0] == 404
+
+def test_index(site):
+    for path in ("/", "/" + mugal26.HTMLFILE):
+        status, headers, body = get(site, path)
+        assert status == 200
+        assert headers["Content-Type"].startswith("text/html")
+        assert body == (site["out_dir"] / mugal26.HTMLFILE).read_bytes()
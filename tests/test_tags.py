@@ -0,0 +1,88 @@
+"""The lite tag reader gives the same track dicts as a full mutagen parse,
+on the synthetic library and on MP3 layouts it must hand back to mutagen."""
+
+import pytest
+
+pytest.importorskip("mutagen")
+
+from mutagen.id3 import APIC, ID3, TALB, TIT2, TPE1
+
+import mugal26
+
+MPEG_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + b"\0" * 413
+JPEG = b"\xff\xd8\xff\xe0" + b"\0" * 600 + b"\xff\xd9"   # zeros, like the inside of a real cover
+
+def scan(path, root, lite: bool, art: bool) -> dict | None:
+    return mugal26.scan_file(path, root, art, mugal26.ArtSettings(), {}, 0, {}, lite_tags=lite)
+
+@pytest.mark.parametrize("art", [True, False])
+def test_library_parity(library, art):
+    files = sorted(library.joinpath(rel) for rel, _ in mugal26.iter_audio_files(library, mugal26.PathFilter([])))
+    assert files
+    for path in files:
+        assert scan(path, library, True, art) == scan(path, library, False, art), path
+
+def test_lite_reader_is_used(library):
+    """Guards the parity check above against passing because every file fell back."""
+    for suffix, reader in mugal26.LITE_READERS.items():
+        files = sorted(library.rglob(f"*{suffix}"))
+        assert files, suffix
+        for path in files:
+            with open(path, "rb") as f:
+                assert reader(f, True) is not None, path
+
+def _frame(fid: bytes, data: bytes, size: bytes | None = None) -> bytes:
+    return fid + (size or len(data).to_bytes(4, "big")) + b"\0\0" + data
+
+def _text(fid: bytes, s: str) -> bytes:
+    return _frame(fid, b"\x03" + s.encode())
+
+def _tag(version: int, body: bytes, padding: bytes = b"\0" * 64) -> bytes:
+    n = len(body) + len(padding)
+    size = bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+    return b"ID3" + bytes([version, 0, 0]) + size + body + padding
+
+def _apic(data: bytes = JPEG) -> bytes:
+    return _frame(b"APIC", b"\x00image/jpeg\x00\x03\x00" + data)
+
+def _v1(title: str, artist: str, album: str) -> bytes:
+    field = lambda s: s.encode("latin-1").ljust(30, b"\0")
+    return b"TAG" + field(title) + field(artist) + field(album) + b"2001" + b"\0" * 30 + b"\xff"
+
+def _mutagen_file(tmp_path, version: int, v1: bool) -> bytes:
+    p = tmp_path / "m.mp3"
+    p.write_bytes(MPEG_FRAME * 20)
+    tags = ID3()
+    for frame in (TIT2(encoding=3, text="Mutagen title"), TPE1(encoding=3, text="Artist"),
+                  TALB(encoding=3, text="Album"), APIC(encoding=3, mime="image/jpeg", type=3, data=JPEG)):
+        tags.add(frame)
+    tags.save(p, v2_version=version, v1=2 if v1 else 0)
+    return p.read_bytes()
+
+CASES = {
+    # v2.4 with frame sizes written as plain integers (older iTunes)
+    "v24 plain sizes": lambda tmp: _tag(4, _text(b"TALB", "Album") + _apic()
+                                        + _text(b"TIT2", "Title here") + _text(b"TPE1", "Some Artist"))
+                                   + MPEG_FRAME * 20,
+    # …where a size byte has its high bit set, which no syncsafe integer does
+    "v24 plain sizes, high bit": lambda tmp: _tag(4, _apic(JPEG[:180]) + _text(b"TIT2", "Title here"))
+                                             + MPEG_FRAME * 20,
+    # only a title in v2; mutagen merges artist and album in from v1
+    "v1 merge": lambda tmp: _tag(4, _text(b"TIT2", "Only v2")) + MPEG_FRAME * 20
+                            + _v1("Only v2", "V1 Artist", "V1 Album"),
+    # bytes after a zero byte inside the tag that are not padding
+    "dirty padding": lambda tmp: _tag(3, _text(b"TIT2", "T") + b"\0" * 10 + _text(b"TPE1", "Hidden"))
+                                 + MPEG_FRAME * 20,
+    "mutagen v2.3": lambda tmp: _mutagen_file(tmp, 3, False),
+    "mutagen v2.4": lambda tmp: _mutagen_file(tmp, 4, False),
+    "mutagen v2.4 + v1": lambda tmp: _mutagen_file(tmp, 4, True),
+}
+
+@pytest.mark.parametrize("art", [True, False])
+@pytest.mark.parametrize("case", CASES)
+def test_mp3_layouts(tmp_path, case, art):
+    path = tmp_path / "case.mp3"
+    path.write_bytes(CASES[case](tmp_path))
+    full = scan(path, tmp_path, False, art)
+    assert full is not None
+    assert scan(path, tmp_path, True, art) == full
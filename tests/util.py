@@ -0,0 +1,59 @@
+"""Helpers shared by the checks: scanning and writing quietly, and reading
+the data scripts back the way the page does."""
+
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+
+import mugal26
+
+def mugal_args(*argv: str):
+    """mugal26's own CLI parse of argv."""
+    saved = sys.argv
+    sys.argv = ["mugal26.py", *argv]
+    try:
+        return mugal26.parse_args()
+    finally:
+        sys.argv = saved
+
+def scan_library(root: Path, *opts: str) -> tuple[list[dict], dict]:
+    """(tracks, art table) of a cache-less, single-process scan of root."""
+    args = mugal_args(str(root), *opts)
+    files = [root / rel for rel, _ in
+             mugal26.iter_audio_files(root, mugal26.PathFilter(args.exclude, args.include))]
+    art: dict = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracks = mugal26.scan_files(files, root, args, 1, mugal26.ArtSettings.from_args(args), {}, art)
+    return [t for t in tracks if t], art
+
+def write_datafile(*args, **kwargs) -> str:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return mugal26.write_datafile(*args, **kwargs)
+
+def load_script(path: Path):
+    """The JSON value a data script assigns or passes (window.X=…; or window.X(i,…);)."""
+    text = path.read_text(encoding="utf-8")
+    if text.startswith("window.__AUDIO_SHARD("):
+        return json.loads(text[text.index(",") + 1:text.rindex(")")])
+    return json.loads(text[text.index("=") + 1:text.rindex(";")])
+
+TRACK_FIELDS = ("path", "folder", *mugal26.PLAIN_FIELDS, *mugal26.STRING_FIELDS)
+
+def decode_tracks(p: dict) -> list[dict]:
+    """Track records of a payload or shard in either data format, as the page's decodeTracks() sees them."""
+    if "columns" not in p:
+        return [{k: t[k] for k in TRACK_FIELDS} for t in p["tracks"]]
+    cols, strings = p["columns"], p["strings"]
+    folders: list[str] = []
+    for parent, seg in p["folders"]:
+        folders.append(seg if parent < 0 else f"{folders[parent]}/{seg}" if folders[parent] else seg)
+    tracks = []
+    for i in range(p["count"]):
+        folder = folders[cols["folder"][i]]
+        t = {"path": f"{folder}/{cols['name'][i]}" if folder else cols["name"][i], "folder": folder}
+        t.update({k: cols[k][i] for k in mugal26.PLAIN_FIELDS})
+        t.update({k: strings[k][cols[k][i]] or (None if k == "art" else "") for k in mugal26.STRING_FIELDS})
+        tracks.append(t)
+    return tracks